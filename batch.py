@@ -0,0 +1,159 @@
+import argparse
+import json
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from interpreter import Interpreter
+from tbio import IteratorInput, MemoryOutput, SEPARATORS
+
+
+class RunResult:
+    def __init__(self, index, output, variables, error, elapsed):
+        self.index = index
+        self.output = output
+        self.variables = variables
+        self.error = error
+        self.elapsed = elapsed
+
+    def as_dict(self):
+        return {
+            'index': self.index,
+            'output': self.output,
+            'variables': self.variables,
+            'error': self.error,
+            'elapsed': self.elapsed,
+        }
+
+
+_worker = None
+
+
+def parse_program(source, mode = 'default'):
+    interpreter = Interpreter(mode=mode)
+    interpreter.load_program(source)
+
+    for number in interpreter.lines.numbers:
+        try:
+            interpreter.get_statement(number)
+        except Exception:
+            pass
+
+    return dict(interpreter.lines.items()), dict(interpreter.lines.statements)
+
+
+def load_parsed(interpreter, program):
+    lines, statements = program
+
+    interpreter.lines.clear()
+    interpreter.lines.load(lines)
+    interpreter.lines.statements.update(statements)
+
+
+def run_interpreter(interpreter, index, values):
+    interpreter.variables.reset()
+    interpreter._stack[:] = []
+    interpreter.output = MemoryOutput()
+    interpreter.input = IteratorInput(values)
+
+    error = None
+    start = time.perf_counter()
+    try:
+        interpreter.run_program()
+    except Exception as e:
+        error = '%s: %s' % (type(e).__name__, e)
+    elapsed = time.perf_counter() - start
+
+    return RunResult(index, interpreter.output.getvalue(), interpreter.variables.as_dict(), error, elapsed)
+
+
+def _initialize_worker(program, engine, mode):
+    global _worker
+
+    _worker = Interpreter(engine=engine, mode=mode)
+    load_parsed(_worker, program)
+
+
+def _run_inputs(task):
+    index, values = task
+    return run_interpreter(_worker, index, values)
+
+
+def _run_program(task):
+    index, program, engine, mode, values = task
+
+    interpreter = Interpreter(engine=engine, mode=mode)
+    load_parsed(interpreter, program)
+    return run_interpreter(interpreter, index, values)
+
+
+def run_batch(source, input_sets, engine = 'tree', workers = None, chunksize = 16, mode = 'default'):
+    program = parse_program(source, mode)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker,
+                             initargs=(program, engine, mode)) as executor:
+        return list(executor.map(_run_inputs, enumerate(input_sets), chunksize=chunksize))
+
+
+def run_programs(sources, engine = 'tree', workers = None, input_values = (), mode = 'default'):
+    tasks = []
+    for index, source in enumerate(sources):
+        try:
+            tasks.append((index, parse_program(source, mode), engine, mode, list(input_values)))
+        except Exception as e:
+            tasks.append((index, None, engine, mode, str(e)))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_program, task) for task in tasks if task[1] is not None]
+        results = dict((result.index, result) for result in (future.result() for future in futures))
+
+    for index, program, engine, mode, error in tasks:
+        if program is None:
+            results[index] = RunResult(index, '', {}, 'Exception: ' + error, 0.0)
+
+    return [results[index] for index in range(len(tasks))]
+
+
+def read_input_sets(path):
+    with open(path) as file:
+        return [[value for value in SEPARATORS.split(line) if value] for line in file if line.strip()]
+
+
+def read_source(path):
+    with open(path) as file:
+        return file.read()
+
+
+def main(argv = None):
+    arguments = argparse.ArgumentParser(description='Run Tiny Basic programs in parallel')
+    arguments.add_argument('programs', nargs='+', help='BASIC programs to run')
+    arguments.add_argument('--inputs', metavar='FILE',
+                           help='run the single program once per line of FILE, using the line as INPUT values')
+    arguments.add_argument('--engine', choices=Interpreter.ENGINES, default='tree')
+    arguments.add_argument('--mode', choices=Interpreter.MODES, default='default', help='arithmetic mode')
+    arguments.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    options = arguments.parse_args(argv)
+
+    if options.inputs is not None and len(options.programs) != 1:
+        arguments.error('--inputs requires exactly one program')
+
+    try:
+        if options.inputs is not None:
+            results = run_batch(read_source(options.programs[0]), read_input_sets(options.inputs),
+                                options.engine, options.workers, mode=options.mode)
+        else:
+            results = run_programs([read_source(path) for path in options.programs],
+                                   options.engine, options.workers, mode=options.mode)
+    except Exception as e:
+        print('Error: ' + str(e), file=sys.stderr)
+        return 1
+
+    for result in results:
+        sys.stdout.write(json.dumps(result.as_dict()) + '\n')
+
+    return 1 if any(result.error is not None for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
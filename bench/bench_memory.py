@@ -0,0 +1,88 @@
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from interpreter import Interpreter
+from program import CompactProgram, Program
+from tbio import MemoryOutput
+
+
+LINES = 200000
+RUN_LINES = 100000
+
+
+def program_lines(count):
+    for i in range(1, count + 1):
+        yield i * 10, ' LET %s = %s + %d' % (chr(65 + i % 26), chr(65 + (i + 1) % 26), i)
+
+
+def measure(factory, count):
+    gc.collect()
+    tracemalloc.start()
+    program = factory(program_lines(count))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return program, size
+
+
+def measure_run(engine, compact, count):
+    gc.collect()
+    tracemalloc.start()
+    interpreter = Interpreter(engine=engine, output=MemoryOutput(), compact=compact)
+    interpreter.lines.load(program_lines(count))
+    interpreter.run_program()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return interpreter, size
+
+
+def measure_cached(path, compact):
+    Interpreter(output=MemoryOutput(), compact=compact).load_file(path, cache=True)
+
+    gc.collect()
+    tracemalloc.start()
+    interpreter = Interpreter(output=MemoryOutput(), compact=compact)
+    interpreter.load_file(path, cache=True)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return interpreter, size
+
+
+def main():
+    text = sum(len(text) for number, text in program_lines(LINES)) / LINES
+
+    print('%d lines, %.1f characters of text per line' % (LINES, text))
+    for name, factory in (('Program', Program), ('CompactProgram', CompactProgram)):
+        program, size = measure(factory, LINES)
+        print('%-16s %12d bytes %8.1f bytes per line' % (name, size, size / LINES))
+
+    print()
+    print('%d lines, after RUN' % RUN_LINES)
+    for engine in ('tree', 'vm'):
+        for name, compact in (('Program', False), ('CompactProgram', True)):
+            interpreter, size = measure_run(engine, compact, RUN_LINES)
+            print('%-16s %-5s %12d bytes %8.1f bytes per line' % (name, engine, size, size / RUN_LINES))
+            del interpreter
+
+    print()
+    print('%d lines, loaded from __tbcache__' % RUN_LINES)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.bas')
+        with open(path, 'w') as file:
+            file.writelines('%d%s\n' % line for line in program_lines(RUN_LINES))
+
+        for name, compact in (('Program', False), ('CompactProgram', True)):
+            interpreter, size = measure_cached(path, compact)
+            print('%-16s %12d bytes %8.1f bytes per line' % (name, size, size / RUN_LINES))
+            del interpreter
+
+
+if __name__ == '__main__':
+    main()
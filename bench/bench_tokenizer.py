@@ -0,0 +1,33 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from tokenizer import CharacterTokenizer, Tokenizer
+
+
+LINES = {
+    'statement': 'IF A <= B THEN LET C = (A + B) * 2 - C / 3',
+    'long expression': 'LET A = ' + ' + '.join(['(B * %d - C)' % i for i in range(200)]),
+    'long string': 'PRINT "' + 'X' * 5000 + '", A',
+    'long number': 'LET A = ' + '9' * 2000,
+}
+
+
+def bench(tokenizer, line, number):
+    return min(timeit.repeat(lambda: tokenizer.parse(line), number=number, repeat=5)) / number
+
+
+def main():
+    for name, line in LINES.items():
+        number = max(1, 20000 // len(line))
+        regex = bench(Tokenizer(), line, number)
+        characters = bench(CharacterTokenizer(), line, number)
+
+        print('%-16s %6d chars  regex %9.1fus  characters %9.1fus  speedup %5.1fx' %
+              (name, len(line), regex * 1e6, characters * 1e6, characters / regex))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from interpreter import Interpreter
+from tbio import BufferedOutput, IteratorInput
+
+
+PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'programs')
+LARGE_PROGRAM_LINES = 20000
+
+
+def read_program(name):
+    with open(os.path.join(PROGRAMS, name + '.bas')) as file:
+        return file.read().splitlines()
+
+
+def large_program():
+    lines = ['%d LET %s = %s + %d' % (i * 10, chr(65 + i % 26), chr(65 + (i + 1) % 26), i)
+             for i in range(1, LARGE_PROGRAM_LINES)]
+    lines.append('%d END' % (LARGE_PROGRAM_LINES * 10))
+    return lines
+
+
+def workloads():
+    names = sorted(name[:-4] for name in os.listdir(PROGRAMS) if name.endswith('.bas'))
+    return [(name, read_program(name)) for name in names] + [('load', large_program())]
+
+
+def create_interpreter(engine, output, mode = 'default'):
+    return Interpreter(engine=engine, output=BufferedOutput(output), input=IteratorInput([]), mode=mode)
+
+
+def count_statements(source, output, mode):
+    interpreter = create_interpreter('tree', output, mode)
+    interpreter.load_program(source)
+
+    profiler = interpreter.enable_profiling()
+    interpreter.run_program()
+
+    return sum(profile.count for profile in profiler.lines.values())
+
+
+def measure(source, engine, mode, output, repeat):
+    best_load = best_run = None
+
+    for i in range(repeat):
+        interpreter = create_interpreter(engine, output, mode)
+
+        gc.collect()
+        start = time.perf_counter()
+        interpreter.load_program(source)
+        loaded = time.perf_counter()
+        interpreter.run_program()
+        interpreter.output.flush()
+        finished = time.perf_counter()
+
+        best_load = min(best_load, loaded - start) if best_load is not None else loaded - start
+        best_run = min(best_run, finished - loaded) if best_run is not None else finished - loaded
+
+    interpreter = create_interpreter(engine, output, mode)
+    gc.collect()
+    tracemalloc.start()
+    interpreter.load_program(source)
+    interpreter.run_program()
+    interpreter.output.flush()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best_load, best_run, peak
+
+
+def run(engines, names, repeat, mode = 'default'):
+    results = []
+
+    with open(os.devnull, 'w') as output:
+        for name, source in workloads():
+            if names and name not in names:
+                continue
+
+            statements = count_statements(source, output, mode)
+
+            for engine in engines:
+                load, elapsed, peak = measure(source, engine, mode, output, repeat)
+                results.append({
+                    'workload': name,
+                    'engine': engine,
+                    'lines': len(source),
+                    'statements': statements,
+                    'load_seconds': load,
+                    'run_seconds': elapsed,
+                    'statements_per_second': statements / elapsed if elapsed else None,
+                    'peak_memory_bytes': peak,
+                })
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'mode': mode,
+        'results': results,
+    }
+
+
+def print_table(report, stream):
+    stream.write('%-12s %-8s %10s %10s %10s %14s %10s\n' %
+                 ('workload', 'engine', 'stmts', 'load ms', 'run ms', 'stmts/sec', 'peak KB'))
+
+    for result in report['results']:
+        stream.write('%-12s %-8s %10d %10.2f %10.2f %14.0f %10.1f\n' %
+                     (result['workload'], result['engine'], result['statements'],
+                      result['load_seconds'] * 1000, result['run_seconds'] * 1000,
+                      result['statements_per_second'] or 0, result['peak_memory_bytes'] / 1024))
+
+
+def main(argv = None):
+    arguments = argparse.ArgumentParser(description='Tiny Basic benchmarks')
+    arguments.add_argument('--engine', action='append', choices=Interpreter.ENGINES,
+                           help='engine to measure (default: all)')
+    arguments.add_argument('--workload', action='append', help='workload to run (default: all)')
+    arguments.add_argument('--repeat', type=int, default=3, help='runs per measurement, best is kept')
+    arguments.add_argument('--mode', choices=Interpreter.MODES, default='default', help='arithmetic mode')
+    arguments.add_argument('--json', metavar='FILE', help='write results as JSON ("-" for stdout)')
+    options = arguments.parse_args(argv)
+
+    report = run(options.engine or list(Interpreter.ENGINES), options.workload, options.repeat, options.mode)
+
+    if options.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print_table(report, sys.stdout)
+
+        if options.json:
+            with open(options.json, 'w') as file:
+                json.dump(report, file, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+10 LET I = 0
+20 LET I = I + 1
+30 IF I < 50000 THEN GOTO 20
+40 END
@@ -0,0 +1,7 @@
+10 LET I = 0
+20 LET A = (I + 1) * (I + 2) - (I + 3) * 4 + (I * I - 7) * (2 * I + 1) - 60 * 60 * 24
+30 LET B = ((A - I) * 3 + (A + I) * 5) / 7 - (A * 2 - (I - 1) * (I + 1)) + 1 * A + 0
+40 LET C = -(A + B) * (A - B) + (A * A - B * B) + 10 * 20 * 30 - (I - 0) * 1
+50 LET I = I + 1
+60 IF I < 5000 THEN GOTO 20
+70 END
@@ -0,0 +1,15 @@
+10 LET I = 0
+20 LET S = 0
+30 GOSUB 100
+40 LET I = I + 1
+50 IF I < 5000 THEN GOTO 30
+60 END
+100 GOSUB 200
+110 GOSUB 300
+120 RETURN
+200 LET S = S + I
+210 RETURN
+300 GOSUB 400
+310 RETURN
+400 LET S = S - 1
+410 RETURN
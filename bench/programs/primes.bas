@@ -0,0 +1,15 @@
+10 LET N = 2
+20 LET C = 0
+30 LET D = 2
+40 LET P = D * D
+50 IF P > N THEN GOTO 100
+60 LET Q = N / D
+70 LET R = Q * D
+80 IF R = N THEN GOTO 110
+90 LET D = D + 1
+95 GOTO 40
+100 LET C = C + 1
+110 LET N = N + 1
+120 IF N <= 2000 THEN GOTO 30
+130 PRINT "PRIMES", C
+140 END
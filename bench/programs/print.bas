@@ -0,0 +1,5 @@
+10 LET I = 0
+20 PRINT "LINE", I, I * I, I * I * I, "END OF LINE"
+30 LET I = I + 1
+40 IF I < 10000 THEN GOTO 20
+50 END
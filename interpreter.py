@@ -1,142 +1,491 @@
-from tbparser import Parser
-from tokenizer import Tokenizer, Token
-
-from collections import OrderedDict
+import argparse
+import mmap
+import os
+import re
+import sys
+import time
+
+import tbcache
+
+from program import CompactProgram, Program
+from tbanalyzer import Analyzer
+from tbcompiler import Compiler
+from tbio import BufferedOutput, ConsoleInput, FileInput
+from tboptimizer import Optimizer
+from tbpeephole import Peephole
+from tbprofiler import Profiler
+from tbstatements import StatementCache
+from tbtrace import TraceCompiler, Tracer
+from tbvm import BytecodeCompiler, VirtualMachine
+from tbparser import Parser, wrap16
+from tokenizer import Tokenizer
+from variables import Variables
+
+LINE_NUMBER = re.compile(r'\s*(\d+)')
 
 class Interpreter:
-    def __init__(self):
-        self.lines = {}
+    ENGINES = ('tree', 'python', 'vm', 'trace')
+    MODES = Parser.MODES
+    MMAP_THRESHOLD = 16 * 1024 * 1024
+
+    def __init__(self, engine = 'tree', output = None, input = None, mode = 'default', compact = False,
+                 check = False, cache_size = StatementCache.SIZE):
+        if engine not in self.ENGINES:
+            raise Exception('Unknown engine: ' + engine)
+
+        self.engine = engine
+        self.mode = mode
+        self.check = check
+        self.output = output if output is not None else BufferedOutput(line_buffered=True)
+        self.input = input if input is not None else ConsoleInput()
+
+        self.lines = CompactProgram() if compact else Program()
+        self._compiled = {}
+        self._analysis = None
+        self.profiler = None
 
         self._program_counter = 0
         self._running = False
+        self.steps = 0
 
         self._stack = []
 
-        self._variables = {}
-        self._parser = Parser(self._variables)
+        self._variables = Variables()
+        self._parser = Parser(self._variables, mode)
+        self._optimizer = Optimizer(self._parser)
+        self.peephole = Peephole()
+        self.statement_cache = StatementCache(cache_size)
+
+    @property
+    def variables(self):
+        return self._variables
+
+    @property
+    def running(self):
+        return self._running and self._program_counter < len(self.lines.numbers)
 
 
     def interactive(self):
         while True:
-            line = input('>')
+            self.output.flush()
+
+            try:
+                line = input('>')
+            except EOFError:
+                return
+
             if len(line):
-                self.interpret_line(line)
+                try:
+                    self.interpret_line(line)
+                finally:
+                    self.output.flush()
 
 
     def interpret_line(self, line):
-        tokenizer = Tokenizer()
-        tokenizer.parse(line)
+        number, text = self.split_line(line)
 
-        first_token = tokenizer.getNextToken()
-        if first_token.type == Token.NUMBER:
-            self.lines[int(first_token.value)] = tokenizer.prog[tokenizer.pos:]
-            self.sort_lines()
+        if number is not None:
+            if text.strip():
+                self.lines[number] = text
+            else:
+                self.lines.pop(number, None)
         else:
             self.run_line(line)
 
+    def load_program(self, lines):
+        if isinstance(lines, str):
+            lines = lines.splitlines()
+
+        program = {}
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if not line.strip():
+                continue
+
+            number, text = self.split_line(line)
+            if number is None:
+                raise Exception('Expected a line number: ' + line)
+
+            program[number] = text if text.strip() else None
+
+        self.lines.load(program)
+
+    def load_file(self, path, cache = False, update_cache = True):
+        if cache:
+            tbcache.load(self, path, update_cache)
+        else:
+            self.read_file(path)
+
+    def read_file(self, path):
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < self.MMAP_THRESHOLD:
+                self.load_program(line.decode('utf-8') for line in file)
+                return
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.load_program(line.decode('utf-8') for line in iter(mapped.readline, b''))
+
+    def split_line(self, line):
+        match = LINE_NUMBER.match(line)
+        if match:
+            return int(match.group(1)), line[match.end():]
+
+        return None, line
+
     def run_line(self, line):
+        self.execute_statement(self.parse_immediate(line))
+
+    def parse_immediate(self, line):
+        statement = self.statement_cache.get(line)
+        if statement is None:
+            statement = self.parse_line(line)
+            self.statement_cache.put(line, statement)
+
+        return statement
+
+    def parse_line(self, line):
         tokenizer = Tokenizer()
         tokenizer.parse(line)
-        self.execute_statement(tokenizer)
-        
-    def execute_statement(self, tokenizer):
-        statement = self._parser.match_statement(tokenizer)
-
-        if statement == 'LET':
-            self.stat_let(tokenizer)
-        elif statement == 'PRINT':
-            self.stat_print(tokenizer)
-        elif statement == 'LIST':
+        return self._optimizer.optimize_statement(self._parser.parse_statement(tokenizer))
+
+    def get_statement(self, number):
+        statement = self.lines.statements.get(number)
+        if statement is None:
+            encoded = self.lines.encoded.pop(number, None)
+            if encoded is not None:
+                statement = tbcache.decode_statement(encoded)
+            else:
+                statement = self.parse_line(self.lines[number])
+
+            statement = self.lines.statements[number] = self.peephole.fuse(statement)
+
+        return statement
+
+    def execute_statement(self, statement):
+        command = statement.command
+
+        if command == 'LET':
+            self.stat_let(statement)
+        elif command == 'PRINT':
+            self.stat_print(statement)
+        elif command == 'LIST':
             self.stat_list()
-        elif statement == 'INPUT':
-            self.stat_input(tokenizer)
-        elif statement == 'IF':
-            self.stat_if(tokenizer)
-        elif statement == 'RUN':
+        elif command == 'INPUT':
+            self.stat_input(statement)
+        elif command == 'IF':
+            self.stat_if(statement)
+        elif command == 'RUN':
             self.run_program()
-        elif statement == 'END':
+        elif command == 'END':
             self.stat_end()
-        elif statement == 'GOTO':
-            self.stat_goto(tokenizer)
-        elif statement == 'GOSUB':
-            self.stat_gosub(tokenizer)
-        elif statement == 'RETURN':
+        elif command == 'GOTO':
+            self.stat_goto(statement)
+        elif command == 'GOSUB':
+            self.stat_gosub(statement)
+        elif command == 'RETURN':
             self.stat_return()
         else:
-            raise Exception('Unrecognised statement: ' + statement.value)
+            raise Exception('Unrecognised statement: ' + command)
+
+    def execute_line(self, statement):
+        if statement.fused is not None:
+            return self.execute_fused(statement)
+
+        statement = self.select_statement(statement)
+        if statement is not None:
+            self.execute_statement(statement)
+
+        return statement
+
+    def select_statement(self, statement):
+        while statement is not None and statement.command == 'IF':
+            statement = statement.then if self._parser.evaluate(statement.expression) else None
+
+        return statement
+
+    def execute_fused(self, statement):
+        fused = statement.fused
+        kind = fused[0]
+
+        if kind == 'BRANCH':
+            executed = statement.then if self.stat_branch(fused) else None
+        elif kind == 'INCREMENT':
+            self.stat_increment(fused)
+            executed = statement
+        elif self.profiler is not None:
+            self.stat_gosub(statement)
+            return statement
+        elif self.stat_call(statement, fused):
+            executed = None
+        else:
+            return statement
+
+        self.peephole.fired[kind] += 1
+        return executed
 
-    def run_program(self):
+    def run_program(self, engine = None):
         self._program_counter = 0
         self._running = True
 
-        self.sort_lines()
+        if self.check and self.analyze().undefined:
+            number, target, command = self.analyze().undefined[0]
+            self._running = False
+            raise Exception('Undefined line number: %s in line %d' % (target, number))
+
+        engine = engine or self.engine
+        if self.profiler is not None:
+            self.run_profiled()
+        elif engine == 'python':
+            compiler = Compiler(self)
+            compiler.run(self.compile_program(engine, compiler))
+        elif engine == 'vm':
+            VirtualMachine(self).run(self.compile_program(engine, BytecodeCompiler(self)))
+        elif engine == 'trace':
+            Tracer(self).run(self.compile_program(engine, TraceCompiler(self)))
+        elif engine == 'tree':
+            self.run_tree()
+        else:
+            raise Exception('Unknown engine: ' + engine)
+
+    def run_tree(self):
+        numbers = self.lines.numbers
 
-        statements = [x for x in self.lines.values()]
+        while self._program_counter < len(numbers) and self._running:
+            self.execute_line(self.get_statement(numbers[self._program_counter]))
+            self._program_counter += 1
+
+    def start_program(self):
+        self._program_counter = 0
+        self._running = True
 
-        while self._program_counter < len(statements) and self._running:
-            statement = statements[self._program_counter]
+    def step(self, count):
+        numbers = self.lines.numbers
+        executed = 0
+
+        try:
+            while executed < count and self._program_counter < len(numbers) and self._running:
+                self.execute_line(self.get_statement(numbers[self._program_counter]))
+                self._program_counter += 1
+                executed += 1
+        finally:
+            self.steps += executed
+
+        return executed
+
+    def run_profiled(self):
+        profiler = self.profiler
+        numbers = self.lines.numbers
+        statements = self.lines.statements
+        clock = time.perf_counter
+
+        while self._program_counter < len(numbers) and self._running:
+            number = numbers[self._program_counter]
+
+            start = parsed = clock()
+            statement = statements.get(number)
+            if statement is None:
+                statement = self.get_statement(number)
+                parsed = clock()
+
+            statement = self.execute_line(statement)
+            profiler.record(number, parsed - start, clock() - parsed)
 
-            self.run_line(statement)
             self._program_counter += 1
-        
-    def sort_lines(self):
-        self.lines = OrderedDict(sorted(self.lines.items(), key=lambda x: x[0]))
 
+            if statement is not None and statement.command in ('GOTO', 'GOSUB', 'RETURN'):
+                target = numbers[self._program_counter] if self._program_counter < len(numbers) else 'END'
+                profiler.record_edge(number, target, statement.command)
+
+    def enable_profiling(self):
+        self.profiler = Profiler()
+        return self.profiler
+
+    def analyze(self):
+        key = (id(self.lines), self.lines.version)
+
+        if self._analysis is None or self._analysis.key != key:
+            self._analysis = Analyzer(self).analyze(self.lines.numbers, key)
 
-    def stat_let(self, tokenizer):
-        variable = tokenizer.getNextToken()
-        if variable.type != Token.VARIABLE:
-            raise Exception("Expected a variable")
+        return self._analysis
 
-        if tokenizer.getNextToken().type != Token.EQUALS:
-            raise Exception('Expected an equals')
+    def compile_program(self, engine, compiler):
+        key = (id(self.lines), self.lines.version)
 
-        self._parser._variables[variable.value] = self._parser.match_expression(tokenizer)
+        compiled = self._compiled.get(engine)
+        if compiled is None or compiled.key[0] != key[0]:
+            compiled = self._compiled[engine] = compiler.compile(self.lines.numbers, key)
+        elif compiled.key != key:
+            changes = self.lines.changes(compiled.key[1])
+            if changes is None:
+                compiled = compiler.compile(self.lines.numbers, key)
+            else:
+                compiled = compiler.update(compiled, changes, key)
+            self._compiled[engine] = compiled
 
+        return compiled
 
-    def stat_print(self, tokenizer):
-        list = self._parser.match_expression_list(tokenizer)
-        print(','.join([str(i) for i in list]))
+    def find_line(self, line_number):
+        return self.lines.find(line_number)
+
+
+    def stat_let(self, statement):
+        self._variables.values[statement.variable] = self._parser.evaluate(statement.expression)
+
+
+    def stat_print(self, statement):
+        list = [self._parser.evaluate(item) for item in statement.items]
+        self.output.write(','.join([str(i) for i in list]) + '\n')
 
     def stat_list(self):
         for no, line in iter(self.lines.items()):
-            print(no, line,)
+            self.output.write(str(no) + ' ' + line + '\n')
 
-    def stat_input(self, tokenizer):
-        vars = self._parser.match_var_list(tokenizer)
-        for var in vars:
-            self._parser._variables[var] = input("?")
+    def stat_input(self, statement):
+        self.output.flush()
+        values = self.input.read_values(len(statement.items))
+        if self._parser.wrap:
+            values = [wrap16(value) for value in values]
 
-    def stat_if(self, tokenizer):
-        result = self._parser.match_relop(tokenizer)
+        for slot, value in zip(statement.items, values):
+            self._variables.values[slot] = value
 
-        then = tokenizer.getNextToken()
-        if then.type != Token.COMMAND or then.value != 'THEN':
-            raise Exception('Expected then after relative operator')
-
-        if result:
-            self.execute_statement(tokenizer)
+    def stat_if(self, statement):
+        if self._parser.evaluate(statement.expression):
+            self.execute_statement(statement.then)
 
     def stat_end(self):
         self._running = False
 
-    def stat_goto(self, tokenizer):
-        line_number = self._parser.match_expression(tokenizer)
+    def stat_goto(self, statement):
+        line_number = statement.target
+        if line_number is None:
+            line_number = self._parser.evaluate(statement.expression)
 
-        self.sort_lines()
-        line_numbers = [x for x in self.lines.keys()]
-        self._program_counter = line_numbers.index(line_number) - 1
+        self._program_counter = self.find_line(line_number) - 1
 
-    def stat_gosub(self, tokenizer):
+    def stat_gosub(self, statement):
         self._stack.append(self._program_counter)
-        self.stat_goto(tokenizer)
+        self.stat_goto(statement)
+
+    def stat_increment(self, fused):
+        slot, step = fused[1], fused[2]
+        values = self._variables.values
+
+        if not self._parser.integer:
+            values[slot] = int(values[slot]) + step
+        elif self._parser.wrap:
+            values[slot] = wrap16(values[slot] + step)
+        else:
+            values[slot] += step
+
+    def stat_branch(self, fused):
+        relop, left, left_value, right, right_value, target = fused[1:]
+        values = self._variables.values
+
+        if left is not None:
+            left_value = values[left] if self._parser.integer else int(values[left])
+        if right is not None:
+            right_value = values[right] if self._parser.integer else int(values[right])
+
+        if not relop(left_value, right_value):
+            return False
+
+        self._program_counter = self.find_line(target) - 1
+        return True
+
+    def stat_call(self, statement, fused):
+        cache = fused[2]
+        if cache[0] != self.lines.version:
+            cache[0] = self.lines.version
+            cache[1] = self.subroutine(fused[1])
+
+        if cache[1] is None:
+            self.stat_gosub(statement)
+            return False
+
+        self.execute_statement(cache[1])
+        return True
+
+    def subroutine(self, target):
+        numbers = self.lines.numbers
+        index = self.lines.line_index().get(target)
+        if index is None or index + 1 >= len(numbers):
+            return None
+
+        try:
+            body = self.get_statement(numbers[index])
+            end = self.get_statement(numbers[index + 1])
+        except Exception:
+            return None
+
+        if (body.command == 'LET' or body.command == 'PRINT') and end.command == 'RETURN':
+            return body
+
+        return None
 
     def stat_return(self):
         self._program_counter = self._stack.pop()
 
 
 
-if __name__ == '__main__':
+def main(argv = None):
+    arguments = argparse.ArgumentParser(description='Tiny Basic in Python')
+    arguments.add_argument('program', nargs='?', help='BASIC program to load')
+    arguments.add_argument('--run', action='store_true', help='run the program and exit')
+    arguments.add_argument('--check', action='store_true',
+                           help='report undefined jump targets, parse errors and unreachable lines and exit; '
+                                'with --run, refuse to start a program that jumps to an undefined line')
+    arguments.add_argument('--engine', choices=Interpreter.ENGINES, default='tree')
+    arguments.add_argument('--mode', choices=Interpreter.MODES, default='default',
+                           help='arithmetic: default, integer (truncating division) or int16 (16-bit wraparound)')
+    arguments.add_argument('--compact', action='store_true',
+                           help='store the program in packed arrays to save memory on very large programs')
+    arguments.add_argument('--input', metavar='FILE', help='read INPUT values from a file')
+    arguments.add_argument('--profile', action='store_true', help='print a per-line profile after --run')
+    arguments.add_argument('--stats', action='store_true', help='print superinstruction counters after --run')
+    arguments.add_argument('--no-cache', action='store_true',
+                           help='do not read or write the parsed program cache in __tbcache__')
+    options = arguments.parse_args(argv)
+
+    if options.run and options.program is None:
+        arguments.error('--run requires a program')
+    if options.check and options.program is None:
+        arguments.error('--check requires a program')
+
+    interp = Interpreter(engine=options.engine, output=BufferedOutput(), mode=options.mode, compact=options.compact,
+                         check=options.check)
+    if options.input is not None:
+        interp.input = FileInput(options.input)
+    if options.profile:
+        interp.enable_profiling()
+
+    try:
+        if options.program is not None:
+            interp.load_file(options.program, cache=not options.no_cache, update_cache=options.run or not options.check)
+
+        if options.check and not options.run:
+            analysis = interp.analyze()
+            sys.stdout.write(analysis.report())
+            return 1 if analysis.errors or analysis.undefined else 0
+
+        if options.run:
+            interp.run_program()
+            interp.output.flush()
+
+            if interp.profiler is not None:
+                sys.stderr.write(interp.profiler.report())
+            if options.stats:
+                sys.stderr.write(interp.peephole.report())
+            return 0
+    except Exception as e:
+        interp.output.flush()
+        print('Error: ' + str(e), file=sys.stderr)
+        return 1
+
     print('Tiny Basic in Python')
-    interp = Interpreter()
-    interp.interactive()
\ No newline at end of file
+    interp.interactive()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,344 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+
+
+class BoundedDict(dict):
+    def __init__(self, size):
+        dict.__init__(self)
+        self.size = size
+
+    def __setitem__(self, key, value):
+        if len(self) >= self.size and key not in self:
+            del self[next(iter(self))]
+
+        dict.__setitem__(self, key, value)
+
+    def update(self, items):
+        if isinstance(items, dict):
+            items = items.items()
+
+        for key, value in items:
+            self[key] = value
+
+
+class LineIndex:
+    def __init__(self, program):
+        self._program = program
+
+    def __getitem__(self, number):
+        position = self._program._position(number)
+        if position is None:
+            raise KeyError(number)
+
+        return position
+
+    def __contains__(self, number):
+        return self._program._position(number) is not None
+
+    def get(self, number, default = None):
+        position = self._program._position(number)
+        return default if position is None else position
+
+
+class BaseProgram(MutableMapping):
+    JOURNAL_SIZE = 4096
+
+    def __init__(self):
+        self._index = None
+        self._stale = 0
+        self._edits = []
+        self._edits_version = 0
+
+        self.statements = {}
+        self.encoded = {}
+        self.version = 0
+
+    def edited(self, number):
+        self.statements.pop(number, None)
+        self.encoded.pop(number, None)
+        self.version += 1
+
+        if len(self._edits) < self.JOURNAL_SIZE:
+            self._edits.append(number)
+        else:
+            self.reset_journal()
+
+    def reset_journal(self):
+        self._edits = []
+        self._edits_version = self.version
+
+    def changes(self, version):
+        if version < self._edits_version or version > self.version:
+            return None
+
+        return set(self._edits[version - self._edits_version:])
+
+    def inserted(self, position):
+        if self._stale > position:
+            self._stale = position
+
+    def deleted(self, position, number):
+        if self._index is not None:
+            self._index.pop(number, None)
+            self.inserted(position)
+
+    @property
+    def numbers(self):
+        return self._numbers
+
+    def line_index(self):
+        if self._index is None or self._stale < len(self._numbers):
+            self.reindex()
+
+        return self._index
+
+    def reindex(self):
+        numbers = self._numbers
+        if self._index is None:
+            self._index = {number: i for i, number in enumerate(numbers)}
+        else:
+            index = self._index
+            for i in range(self._stale, len(numbers)):
+                index[numbers[i]] = i
+
+        self._stale = len(numbers)
+
+
+class Program(BaseProgram):
+    def __init__(self, lines = None):
+        BaseProgram.__init__(self)
+        self._numbers = []
+        self._text = {}
+
+        if lines:
+            self.load(lines)
+
+    def __getitem__(self, number):
+        return self._text[number]
+
+    def __setitem__(self, number, text):
+        if number not in self._text:
+            position = bisect_left(self._numbers, number)
+            self._numbers.insert(position, number)
+            self.inserted(position)
+
+        self._text[number] = text
+        self.edited(number)
+
+    def __delitem__(self, number):
+        del self._text[number]
+
+        position = bisect_left(self._numbers, number)
+        del self._numbers[position]
+        self.deleted(position, number)
+        self.edited(number)
+
+    def __iter__(self):
+        return iter(self._numbers)
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __contains__(self, number):
+        return number in self._text
+
+    def __repr__(self):
+        return 'Program(%r)' % dict(self.items())
+
+    def clear(self):
+        self._numbers = []
+        self._text = {}
+        self._index = None
+        self.statements = {}
+        self.encoded = {}
+        self.version += 1
+        self.reset_journal()
+
+    def load(self, lines):
+        if isinstance(lines, dict):
+            lines = lines.items()
+
+        for number, text in lines:
+            if text is None:
+                self._text.pop(number, None)
+            else:
+                self._text[number] = text
+            self.statements.pop(number, None)
+            self.encoded.pop(number, None)
+
+        self._numbers = sorted(self._text)
+        self._index = None
+        self.version += 1
+        self.reset_journal()
+
+    def find(self, number):
+        try:
+            return self.line_index()[number]
+        except (KeyError, TypeError):
+            raise Exception('Undefined line number: ' + str(number))
+
+
+class CompactProgram(BaseProgram):
+    STATEMENTS = 4096
+
+    def __init__(self, lines = None):
+        BaseProgram.__init__(self)
+        self.statements = BoundedDict(self.STATEMENTS)
+        self.encoded = BoundedDict(self.STATEMENTS)
+        self._line_index = LineIndex(self)
+        self._numbers = array('i')
+        self._starts = array('I')
+        self._lengths = array('I')
+        self._buffer = bytearray()
+        self._garbage = 0
+
+        if lines:
+            self.load(lines)
+
+    def _position(self, number):
+        position = bisect_left(self._numbers, number)
+        if position < len(self._numbers) and self._numbers[position] == number:
+            return position
+
+        return None
+
+    def _read(self, position):
+        start = self._starts[position]
+        return self._buffer[start:start + self._lengths[position]].decode('utf-8')
+
+    def __getitem__(self, number):
+        position = self._position(number)
+        if position is None:
+            raise KeyError(number)
+
+        return self._read(position)
+
+    def __setitem__(self, number, text):
+        data = text.encode('utf-8')
+
+        position = self._position(number)
+        if position is None:
+            position = bisect_left(self._numbers, number)
+            try:
+                self._numbers.insert(position, number)
+            except OverflowError:
+                raise Exception('Line number out of range: ' + str(number))
+
+            self._starts.insert(position, 0)
+            self._lengths.insert(position, 0)
+            self.inserted(position)
+        else:
+            self._garbage += self._lengths[position]
+
+        self._starts[position] = len(self._buffer)
+        self._lengths[position] = len(data)
+        self._buffer += data
+        self.edited(number)
+
+        if self._garbage > len(self._buffer) // 2:
+            self.compact()
+
+    def __delitem__(self, number):
+        position = self._position(number)
+        if position is None:
+            raise KeyError(number)
+
+        self._garbage += self._lengths[position]
+        del self._numbers[position]
+        del self._starts[position]
+        del self._lengths[position]
+        self.deleted(position, number)
+        self.edited(number)
+
+    def __iter__(self):
+        return iter(self._numbers)
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __contains__(self, number):
+        return self._position(number) is not None
+
+    def __repr__(self):
+        return 'CompactProgram(%r)' % dict(self.items())
+
+    def items(self):
+        for position in range(len(self._numbers)):
+            yield self._numbers[position], self._read(position)
+
+    def clear(self):
+        self._numbers = array('i')
+        self._starts = array('I')
+        self._lengths = array('I')
+        self._buffer = bytearray()
+        self._garbage = 0
+        self.statements = BoundedDict(self.STATEMENTS)
+        self.encoded = BoundedDict(self.STATEMENTS)
+        self.version += 1
+        self.reset_journal()
+
+    def load(self, lines):
+        if isinstance(lines, dict):
+            lines = lines.items()
+
+        changes = {}
+        for number, text in lines:
+            changes[number] = text
+            self.statements.pop(number, None)
+            self.encoded.pop(number, None)
+
+        if len(self._numbers):
+            merged = dict(self.items())
+            merged.update(changes)
+            changes = merged
+
+        self.rebuild(sorted((number, text) for number, text in changes.items() if text is not None))
+
+    def rebuild(self, lines):
+        numbers = array('i')
+        starts = array('I')
+        lengths = array('I')
+        buffer = bytearray()
+
+        for number, text in lines:
+            data = text.encode('utf-8')
+            try:
+                numbers.append(number)
+            except OverflowError:
+                raise Exception('Line number out of range: ' + str(number))
+            starts.append(len(buffer))
+            lengths.append(len(data))
+            buffer += data
+
+        self._numbers = numbers
+        self._starts = starts
+        self._lengths = lengths
+        self._buffer = buffer
+        self._garbage = 0
+        self.version += 1
+        self.reset_journal()
+
+    def compact(self):
+        buffer = bytearray()
+        for position in range(len(self._numbers)):
+            start = self._starts[position]
+            self._starts[position] = len(buffer)
+            buffer += self._buffer[start:start + self._lengths[position]]
+
+        self._buffer = buffer
+        self._garbage = 0
+
+    def line_index(self):
+        return self._line_index
+
+    def find(self, number):
+        try:
+            position = self._position(number)
+        except TypeError:
+            position = None
+
+        if position is None:
+            raise Exception('Undefined line number: ' + str(number))
+
+        return position
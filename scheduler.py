@@ -0,0 +1,106 @@
+import time
+
+from collections import deque
+
+from tbio import InputPending
+
+
+class Task:
+    READY = 'ready'
+    WAITING = 'waiting'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+
+    def __init__(self, name, interpreter, max_steps = None, max_time = None):
+        self.name = name
+        self.interpreter = interpreter
+        self.max_steps = max_steps
+        self.max_time = max_time
+
+        self.state = self.READY
+        self.error = None
+        self.steps = 0
+        self._first_step = interpreter.steps
+        self.slices = 0
+        self.elapsed = 0.0
+
+    @property
+    def statements_per_second(self):
+        return self.steps / self.elapsed if self.elapsed else 0.0
+
+    def fail(self, message):
+        self.interpreter.stat_end()
+        self.state = self.FAILED
+        self.error = message
+
+
+class Scheduler:
+    QUANTUM = 100
+
+    def __init__(self, quantum = QUANTUM):
+        self.quantum = quantum
+        self.tasks = []
+
+        self._ready = deque()
+
+    def add(self, interpreter, name = None, max_steps = None, max_time = None):
+        task = Task(name if name is not None else str(len(self.tasks) + 1), interpreter, max_steps, max_time)
+        self.tasks.append(task)
+
+        interpreter.start_program()
+        self._ready.append(task)
+        return task
+
+    def run(self):
+        waiting = 0
+
+        while self._ready and waiting < len(self._ready):
+            task = self._ready.popleft()
+            self.run_slice(task)
+
+            if task.state == Task.READY:
+                waiting = 0
+                self._ready.append(task)
+            elif task.state == Task.WAITING:
+                waiting += 1
+                self._ready.append(task)
+
+    def run_slice(self, task):
+        count = self.quantum
+        if task.max_steps is not None:
+            count = min(count, task.max_steps - task.steps)
+            if count <= 0:
+                task.fail('Step quota exceeded')
+                return
+
+        interpreter = task.interpreter
+        start = time.perf_counter()
+        try:
+            interpreter.step(count)
+            task.state = Task.READY
+        except InputPending:
+            task.state = Task.WAITING
+        except Exception as e:
+            task.fail(str(e))
+        task.elapsed += time.perf_counter() - start
+        task.steps = interpreter.steps - task._first_step
+        task.slices += 1
+
+        if task.state == Task.FAILED:
+            return
+
+        if not interpreter.running:
+            task.state = Task.FINISHED
+        elif task.max_time is not None and task.elapsed >= task.max_time:
+            task.fail('Time quota exceeded')
+
+    def report(self):
+        text = ['%-12s %-9s %10s %8s %10s %14s  %s' %
+                ('program', 'state', 'steps', 'slices', 'time ms', 'stmts/sec', 'error')]
+
+        for task in self.tasks:
+            text.append('%-12s %-9s %10d %8d %10.2f %14.0f  %s' %
+                        (task.name, task.state, task.steps, task.slices, task.elapsed * 1000,
+                         task.statements_per_second, task.error or ''))
+
+        return '\n'.join(text) + '\n'
@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import sys
+
+from interpreter import Interpreter
+from tbio import InputPending, MemoryOutput, QueueInput
+
+
+class Session:
+    QUANTUM = 100
+
+    def __init__(self, reader, writer, quantum = QUANTUM):
+        self.reader = reader
+        self.writer = writer
+        self.quantum = quantum
+
+        self.output = MemoryOutput()
+        self.input = QueueInput()
+        self.interpreter = Interpreter(output=self.output, input=self.input)
+
+        self._lines = asyncio.Queue()
+
+    async def serve(self):
+        receiver = asyncio.ensure_future(self.receive())
+
+        try:
+            await self.send('Tiny Basic in Python\n')
+
+            while True:
+                await self.send('>')
+
+                line = await self._lines.get()
+                if line is None:
+                    return
+
+                if line.strip():
+                    await self.interpret_line(line)
+        except ConnectionError:
+            pass
+        finally:
+            receiver.cancel()
+            self.writer.close()
+
+    async def receive(self):
+        while True:
+            data = await self.reader.readline()
+            if not data:
+                await self._lines.put(None)
+                return
+
+            await self._lines.put(data.decode('utf-8', 'replace').rstrip('\r\n'))
+
+    async def interpret_line(self, line):
+        interpreter = self.interpreter
+
+        try:
+            number, text = interpreter.split_line(line)
+            if number is not None:
+                interpreter.interpret_line(line)
+                return
+
+            statement = interpreter.select_statement(interpreter.parse_immediate(line))
+            if statement is None:
+                pass
+            elif statement.command == 'RUN':
+                await self.run_program()
+            else:
+                while not await self.execute(interpreter.execute_statement, statement):
+                    pass
+        except Exception as e:
+            interpreter.stat_end()
+            self.output.write('Error: ' + str(e) + '\n')
+
+        await self.send()
+
+    async def run_program(self):
+        interpreter = self.interpreter
+        interpreter.start_program()
+
+        while interpreter.running and not self.writer.is_closing():
+            if await self.execute(interpreter.step, self.quantum):
+                await self.send()
+
+    async def execute(self, function, *arguments):
+        try:
+            function(*arguments)
+        except InputPending:
+            await self.send('?')
+
+            line = await self._lines.get()
+            if line is None:
+                self.input.close()
+                self._lines.put_nowait(None)
+            else:
+                self.input.feed(line)
+            return False
+
+        return True
+
+    async def send(self, prompt = ''):
+        text = self.output.getvalue() + prompt
+        self.output.clear()
+
+        if text and not self.writer.is_closing():
+            self.writer.write(text.replace('\n', '\r\n').encode('utf-8'))
+            await self.writer.drain()
+        else:
+            await asyncio.sleep(0)
+
+
+class Server:
+    def __init__(self, host = '127.0.0.1', port = 2323, quantum = Session.QUANTUM):
+        self.host = host
+        self.port = port
+        self.quantum = quantum
+        self.sessions = set()
+
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.connected, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def connected(self, reader, writer):
+        session = Session(reader, writer, self.quantum)
+        self.sessions.add(session)
+
+        try:
+            await session.serve()
+        finally:
+            self.sessions.discard(session)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+def main(argv = None):
+    arguments = argparse.ArgumentParser(description='Tiny Basic server')
+    arguments.add_argument('--host', default='127.0.0.1')
+    arguments.add_argument('--port', type=int, default=2323)
+    arguments.add_argument('--quantum', type=int, default=Session.QUANTUM,
+                           help='statements run before yielding to other sessions')
+    options = arguments.parse_args(argv)
+
+    try:
+        asyncio.run(Server(options.host, options.port, options.quantum).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+class Analysis:
+    def __init__(self, key, numbers):
+        self.key = key
+        self.numbers = numbers
+        self.successors = []
+        self.targets = {}
+        self.undefined = []
+        self.errors = {}
+        self.computed = False
+        self.reachable = set()
+
+    @property
+    def unreachable(self):
+        return [number for i, number in enumerate(self.numbers) if i not in self.reachable]
+
+    def report(self):
+        messages = [(number, 'error: ' + str(error)) for number, error in self.errors.items()]
+        messages.extend((number, 'error: %s to undefined line %s' % (command, target))
+                        for number, target, command in self.undefined)
+        messages.extend((number, 'warning: unreachable') for number in self.unreachable)
+
+        return ''.join('%8d  %s\n' % message for message in sorted(messages))
+
+
+class Analyzer:
+    def __init__(self, interpreter):
+        self._interpreter = interpreter
+
+    def analyze(self, numbers, key = None):
+        analysis = Analysis(key, numbers)
+        index = self._interpreter.lines.line_index()
+        end = len(numbers)
+
+        for i, number in enumerate(numbers):
+            try:
+                statement = self._interpreter.get_statement(number)
+            except Exception as e:
+                analysis.errors[number] = e
+                analysis.successors.append(())
+                continue
+
+            successors = set()
+            while statement.command == 'IF':
+                successors.add(i + 1)
+                statement = statement.then
+
+            command = statement.command
+            if command == 'GOTO' or command == 'GOSUB':
+                target = statement.target
+                if target is None:
+                    analysis.computed = True
+                    successors.update(range(end))
+                elif target in index:
+                    analysis.targets[i] = index[target]
+                    successors.add(index[target])
+                else:
+                    analysis.undefined.append((number, target, command))
+
+                if command == 'GOSUB' and (target is None or target in index):
+                    successors.add(i + 1)
+            elif command == 'RUN':
+                successors.update((0, i + 1))
+            elif command != 'END' and command != 'RETURN':
+                successors.add(i + 1)
+
+            analysis.successors.append(tuple(sorted(successors)))
+
+        pending = [0] if numbers else []
+        reachable = analysis.reachable
+        while pending:
+            i = pending.pop()
+            if i in reachable or i >= end:
+                continue
+
+            reachable.add(i)
+            pending.extend(analysis.successors[i])
+
+        return analysis
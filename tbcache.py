@@ -0,0 +1,132 @@
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import zlib
+
+from tbparser import Node, Statement
+
+
+MAGIC = b'TBC\x00'
+VERSION = 1
+DIRECTORY = '__tbcache__'
+BLOCK_SIZE = 1024 * 1024
+
+
+def cache_path(path):
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, DIRECTORY, name + '.tbc')
+
+
+def cache_key(path, mode = 'default'):
+    digest = hashlib.sha256(mode.encode('ascii') + b'\x00')
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(BLOCK_SIZE), b''):
+            digest.update(block)
+
+    header = MAGIC + struct.pack('<HBB', VERSION, sys.version_info[0], sys.version_info[1])
+    return header + digest.digest()
+
+
+def encode_node(node):
+    if node is None:
+        return None
+
+    return (node.type, node.value, encode_node(node.left), encode_node(node.right))
+
+
+def decode_node(encoded):
+    if encoded is None:
+        return None
+
+    type, value, left, right = encoded
+    return Node(type, value, decode_node(left), decode_node(right))
+
+
+def encode_statement(statement):
+    if statement is None:
+        return None
+
+    items = statement.items
+    if statement.command == 'PRINT':
+        items = tuple(encode_node(item) for item in items)
+    elif items is not None:
+        items = tuple(items)
+
+    return (statement.command, statement.variable, encode_node(statement.expression), items,
+            encode_statement(statement.then), statement.target)
+
+
+def decode_statement(encoded):
+    if encoded is None:
+        return None
+
+    command, variable, expression, items, then, target = encoded
+    if command == 'PRINT':
+        items = [decode_node(item) for item in items]
+    elif items is not None:
+        items = list(items)
+
+    statement = Statement(command, variable, decode_node(expression), items, decode_statement(then))
+    statement.target = target
+    return statement
+
+
+def read(path, key):
+    try:
+        with open(path, 'rb') as file:
+            if file.read(len(key)) != key:
+                return None
+
+            numbers, text, statements = marshal.loads(zlib.decompress(file.read()))
+    except Exception:
+        return None
+
+    if not len(numbers) == len(text) == len(statements):
+        return None
+
+    return numbers, text, statements
+
+
+def write(path, key, interpreter, numbers):
+    statements = []
+    for number in numbers:
+        try:
+            statements.append(encode_statement(interpreter.get_statement(number)))
+        except Exception:
+            statements.append(None)
+
+    data = marshal.dumps((tuple(numbers), tuple(interpreter.lines[number] for number in numbers),
+                          tuple(statements)))
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        temporary = '%s.%d.tmp' % (path, os.getpid())
+        with open(temporary, 'wb') as file:
+            file.write(key)
+            file.write(zlib.compress(data))
+        os.replace(temporary, path)
+    except OSError:
+        pass
+
+
+def load(interpreter, path, update = True):
+    key = cache_key(path, interpreter.mode)
+    cached = cache_path(path)
+
+    entry = read(cached, key)
+    if entry is not None:
+        numbers, text, statements = entry
+        interpreter.lines.load(zip(numbers, text))
+        interpreter.lines.encoded.update((number, statement) for number, statement in zip(numbers, statements)
+                                         if statement is not None)
+        return True
+
+    empty = not len(interpreter.lines)
+    interpreter.read_file(path)
+
+    if update and empty:
+        write(cached, key, interpreter, interpreter.lines.numbers)
+    return False
@@ -0,0 +1,404 @@
+from bisect import bisect_left, bisect_right
+
+from tbparser import Node, divide, wrap16
+from variables import Variables
+
+
+class Segment:
+    def __init__(self, start):
+        self.start = start
+        self.targets = set()
+        self.variables = set()
+        self.gosubs = []
+        self.computed = False
+        self.skipped = False
+        self.function = None
+        self.source = ''
+
+
+class CompiledProgram:
+    def __init__(self, key, segments):
+        self.key = key
+        self.segments = segments
+        self.starts = [segment.start for segment in segments]
+        self.references = {}
+        self.computed = False
+
+    @property
+    def source(self):
+        return ''.join(segment.source for segment in self.segments)
+
+    def find(self, number):
+        return bisect_right(self.starts, number) - 1
+
+
+class Compiler:
+    RELOPS = {'<': '<', '>': '>', '<=': '<=', '>=': '>=', '=': '==', '<>': '!=', '><': '!='}
+    SEGMENT = 256
+
+    def __init__(self, interpreter):
+        self._interpreter = interpreter
+        self._integer = interpreter._parser.integer
+        self._wrap = interpreter._parser.wrap
+
+    def compile(self, numbers, key = None):
+        self._statements = {}
+        self._errors = {}
+
+        segments = [Segment(numbers[i] if i else 0) for i in range(0, len(numbers), self.SEGMENT)]
+        compiled = CompiledProgram(key, segments or [Segment(0)])
+
+        reachable = self._interpreter.analyze().reachable
+        for k, segment in enumerate(compiled.segments):
+            self.collect_segment(segment, self.segment_numbers(compiled, k), reachable)
+            for target in segment.targets:
+                compiled.references[target] = compiled.references.get(target, 0) + 1
+
+        compiled.computed = any(segment.computed for segment in compiled.segments)
+        for k in range(len(compiled.segments)):
+            self.emit_segment(compiled, k)
+
+        return compiled
+
+    def update(self, compiled, changes, key = None):
+        self._statements = {}
+        self._errors = {}
+
+        dirty = set(compiled.find(number) for number in changes)
+        dirty.update(k for k, segment in enumerate(compiled.segments) if segment.skipped)
+        pending = self.split(compiled, dirty)
+
+        index = self._interpreter.lines.line_index()
+        references = compiled.references
+        done = set()
+        while pending:
+            k = pending.pop()
+            done.add(k)
+
+            segment = compiled.segments[k]
+            previous = segment.targets
+            self.collect_segment(segment, self.segment_numbers(compiled, k))
+
+            for target in previous - segment.targets:
+                references[target] -= 1
+                if not references[target]:
+                    del references[target]
+
+            for target in segment.targets - previous:
+                if target not in references and target in index and compiled.find(target) not in done:
+                    pending.add(compiled.find(target))
+                references[target] = references.get(target, 0) + 1
+
+        if not compiled.computed and any(segment.computed for segment in compiled.segments):
+            return self.compile(self._interpreter.lines.numbers, key)
+
+        for k in done:
+            self.emit_segment(compiled, k)
+
+        compiled.key = key
+        return compiled
+
+    def split(self, compiled, dirty):
+        segments = []
+        marked = set()
+
+        for k, segment in enumerate(compiled.segments):
+            if k not in dirty:
+                segments.append(segment)
+                continue
+
+            numbers = self.segment_numbers(compiled, k)
+            marked.add(len(segments))
+            segments.append(segment)
+
+            if len(numbers) > 2 * self.SEGMENT:
+                for i in range(self.SEGMENT, len(numbers), self.SEGMENT):
+                    marked.add(len(segments))
+                    segments.append(Segment(numbers[i]))
+
+        compiled.segments = segments
+        compiled.starts = [segment.start for segment in segments]
+        return marked
+
+    def segment_numbers(self, compiled, k):
+        numbers = self._interpreter.lines.numbers
+        first = bisect_left(numbers, compiled.starts[k])
+        last = bisect_left(numbers, compiled.starts[k + 1]) if k + 1 < len(compiled.starts) else len(numbers)
+
+        return numbers[first:last]
+
+    def run(self, compiled):
+        interpreter = self._interpreter
+        numbers = interpreter.lines.numbers
+        find_line = interpreter.find_line
+        segments = compiled.segments
+        arguments = (interpreter, interpreter._variables.values, interpreter._stack, interpreter.output.write,
+                     interpreter.input.read_values)
+
+        if not len(numbers):
+            return
+
+        pc = (numbers[0], 0)
+        while pc is not None:
+            number, offset = pc
+            if offset:
+                i = find_line(number) + 1
+                if i >= len(numbers):
+                    return
+                number = numbers[i]
+            else:
+                find_line(number)
+
+            pc = segments[compiled.find(number)].function(number, *arguments)
+
+
+    def namespace(self):
+        return {'_divide': divide, '_wrap16': wrap16}
+
+    def collect_segment(self, segment, numbers, reachable = None):
+        index = self._interpreter.lines.line_index()
+        self._variables = set()
+        self._computed = False
+
+        segment.targets = set()
+        segment.gosubs = []
+        segment.skipped = False
+
+        for number in numbers:
+            if reachable is not None and index[number] not in reachable:
+                segment.skipped = True
+                self._statements[number] = None
+                continue
+
+            try:
+                statement = self._interpreter.get_statement(number)
+            except Exception as e:
+                self._errors[number] = e
+                statement = None
+
+            self._statements[number] = statement
+            self.collect(statement, segment.targets)
+
+            while statement is not None and statement.command == 'IF':
+                statement = statement.then
+            if statement is not None and statement.command == 'GOSUB':
+                segment.gosubs.append(number)
+
+        segment.variables = self._variables
+        segment.computed = self._computed
+
+    def collect(self, statement, targets):
+        if statement is None:
+            return
+
+        command = statement.command
+        if command == 'LET':
+            self._variables.add(statement.variable)
+            self.collect_expression(statement.expression)
+        elif command == 'PRINT':
+            for item in statement.items:
+                self.collect_expression(item)
+        elif command == 'INPUT':
+            self._variables.update(statement.items)
+        elif command == 'IF':
+            self.collect_expression(statement.expression)
+            self.collect(statement.then, targets)
+        elif command == 'GOTO' or command == 'GOSUB':
+            self.collect_expression(statement.expression)
+
+            if statement.target is None:
+                self._computed = True
+            else:
+                targets.add(statement.target)
+
+    def collect_expression(self, node):
+        if node is None:
+            return
+
+        if node.type == Node.VARIABLE:
+            self._variables.add(node.value)
+
+        self.collect_expression(node.left)
+        self.collect_expression(node.right)
+
+
+    def emit(self, indent, text):
+        self._lines.append('    ' * indent + text)
+
+    def emit_store(self, indent):
+        if not self._variables:
+            self.emit(indent, 'pass')
+
+        for slot in sorted(self._variables):
+            self.emit(indent, '_variables[%d] = %s' % (slot, self.local(slot)))
+
+    def emit_load(self, indent):
+        for slot in sorted(self._variables):
+            self.emit(indent, '%s = _variables[%d]' % (self.local(slot), slot))
+
+    def local(self, slot):
+        return 'v_' + Variables.NAMES[slot]
+
+    def emit_segment(self, compiled, k):
+        segment = compiled.segments[k]
+        numbers = self.segment_numbers(compiled, k)
+        if not len(numbers):
+            segment.function = None
+            segment.source = ''
+            return
+
+        positions = {number: i for i, number in enumerate(numbers)}
+        self._numbers = numbers
+        self._positions = positions
+        self._returns = {number: numbers[positions[number] + 1] for number in segment.gosubs
+                         if positions[number] + 1 < len(numbers)}
+        self._variables = segment.variables
+
+        if compiled.computed:
+            labels = set(range(len(numbers)))
+        else:
+            labels = {positions[target] for target in segment.targets if target in positions}
+            labels.update(positions[target] for target in compiled.references if target in positions)
+            labels.update(positions[number] for number in self._returns.values())
+            labels.add(0)
+        self._labels = labels
+        self._lines = []
+
+        self.emit(0, 'def segment(pc, _interpreter, _variables, _stack, _write, _read):')
+        self.emit_load(1)
+        self.emit(1, 'try:')
+        self.emit(2, 'while True:')
+        self.emit_dispatch(sorted(labels), 3)
+        self.emit(1, 'finally:')
+        self.emit_store(2)
+
+        source = '\n'.join(self._lines) + '\n'
+        namespace = self.namespace()
+        namespace['_errors'] = {number: self._errors[number] for number in numbers if number in self._errors}
+        namespace['_returns'] = self._returns
+        exec(compile(source, '<basic>', 'exec'), namespace)
+
+        segment.function = namespace['segment']
+        segment.source = source
+
+    def emit_dispatch(self, labels, indent):
+        if len(labels) == 1:
+            self.emit_block(labels[0], indent)
+            return
+
+        middle = len(labels) // 2
+        self.emit(indent, 'if pc < %d:' % self._numbers[labels[middle]])
+        self.emit_dispatch(labels[:middle], indent + 1)
+        self.emit(indent, 'else:')
+        self.emit_dispatch(labels[middle:], indent + 1)
+
+    def emit_block(self, label, indent):
+        numbers = self._numbers
+
+        i = label
+        while True:
+            number = numbers[i]
+            self.emit(indent, '# %d' % number)
+
+            statement = self._statements[number]
+            if number in self._errors:
+                self.emit(indent, 'raise _errors[%d]' % number)
+            elif statement is not None:
+                self.emit_statement(statement, number, indent)
+
+            i += 1
+            if i == len(numbers):
+                self.emit(indent, 'return %d, 1' % number)
+                return
+
+            if i in self._labels:
+                self.emit(indent, 'pc = %d' % numbers[i])
+                self.emit(indent, 'continue')
+                return
+
+    def emit_statement(self, statement, number, indent):
+        command = statement.command
+
+        if command == 'LET':
+            self.emit(indent, '%s = %s' % (self.local(statement.variable), self.expression(statement.expression)))
+        elif command == 'PRINT':
+            items = ', '.join([repr(item.value) if item.type == Node.STRING else 'str(%s)' % self.expression(item)
+                               for item in statement.items])
+            self.emit(indent, "_write(','.join([%s]) + '\\n')" % items)
+        elif command == 'LIST':
+            self.emit(indent, '_interpreter.stat_list()')
+        elif command == 'INPUT':
+            self.emit(indent, '_interpreter.output.flush()')
+            names = ', '.join([self.local(slot) for slot in statement.items])
+            if self._wrap:
+                self.emit(indent, '(%s,) = map(_wrap16, _read(%d))' % (names, len(statement.items)))
+            else:
+                self.emit(indent, '(%s,) = _read(%d)' % (names, len(statement.items)))
+        elif command == 'IF':
+            self.emit(indent, 'if %s:' % self.condition(statement.expression))
+            self.emit_statement(statement.then, number, indent + 1)
+        elif command == 'RUN':
+            self.emit_store(indent)
+            self.emit(indent, '_interpreter.run_program()')
+            self.emit_load(indent)
+            self.emit(indent, 'return')
+        elif command == 'END':
+            self.emit(indent, '_interpreter._running = False')
+            self.emit(indent, 'return')
+        elif command == 'GOTO' or command == 'GOSUB':
+            if command == 'GOSUB':
+                self.emit(indent, '_stack.append(%d)' % number)
+
+            target = statement.target
+            if target is None:
+                self.emit(indent, 'return %s, 0' % self.expression(statement.expression))
+            elif target in self._positions:
+                self.emit(indent, 'pc = %r' % target)
+                self.emit(indent, 'continue')
+            else:
+                self.emit(indent, 'return %r, 0' % target)
+        elif command == 'RETURN':
+            if self._returns:
+                self.emit(indent, 'pc = _stack.pop()')
+                self.emit(indent, 'if pc in _returns:')
+                self.emit(indent + 1, 'pc = _returns[pc]')
+                self.emit(indent + 1, 'continue')
+                self.emit(indent, 'return pc, 1')
+            else:
+                self.emit(indent, 'return _stack.pop(), 1')
+
+    def condition(self, node):
+        if node.type == Node.RELOP:
+            return '%s %s %s' % (self.expression(node.left), self.RELOPS[node.value], self.expression(node.right))
+
+        return self.expression(node)
+
+    def expression(self, node):
+        type = node.type
+
+        if type == Node.NUMBER:
+            return repr(node.value)
+        elif type == Node.VARIABLE:
+            if self._integer:
+                return self.local(node.value)
+
+            return 'int(%s)' % self.local(node.value)
+        elif type == Node.OPERATOR:
+            if node.value == '/' and self._integer:
+                text = '_divide(%s, %s)' % (self.expression(node.left), self.expression(node.right))
+            else:
+                text = '(%s %s %s)' % (self.expression(node.left), node.value, self.expression(node.right))
+
+            return self.wrap(text)
+        elif type == Node.RELOP:
+            return 'int(%s)' % self.condition(node)
+        elif type == Node.NEGATE:
+            return self.wrap('(-%s)' % self.expression(node.left))
+        else:
+            raise Exception('Unexpected node type')
+
+    def wrap(self, text):
+        if self._wrap:
+            return '((%s + 32768 & 65535) - 32768)' % text
+
+        return text
@@ -0,0 +1,174 @@
+import re
+import sys
+
+from collections import deque
+
+
+SEPARATORS = re.compile(r'[\s,]+')
+
+
+def parse_value(value):
+    if isinstance(value, int):
+        return value
+
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise Exception('Invalid number: ' + str(value))
+
+
+class InputPending(Exception):
+    pass
+
+
+class BufferedOutput:
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, stream = None, buffer_size = BUFFER_SIZE, line_buffered = False):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.line_buffered = line_buffered
+
+        self._buffer = []
+        self._size = 0
+
+    def write(self, text):
+        self._buffer.append(text)
+        self._size += len(text)
+
+        if self._size >= self.buffer_size or self.line_buffered and text.endswith('\n'):
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            stream = self.stream or sys.stdout
+            stream.write(''.join(self._buffer))
+            stream.flush()
+
+            self._buffer = []
+            self._size = 0
+
+    def close(self):
+        self.flush()
+
+
+class MemoryOutput:
+    def __init__(self):
+        self._buffer = []
+
+    def write(self, text):
+        self._buffer.append(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(self._buffer)
+
+    def clear(self):
+        self._buffer = []
+
+
+class FileOutput(BufferedOutput):
+    def __init__(self, path, buffer_size = BufferedOutput.BUFFER_SIZE):
+        BufferedOutput.__init__(self, open(path, 'w'), buffer_size)
+
+    def close(self):
+        self.flush()
+        self.stream.close()
+
+
+class Input:
+    def __init__(self):
+        self._values = deque()
+
+    def read_values(self, count):
+        while len(self._values) < count:
+            values = self.more()
+            if values is None:
+                raise Exception('Out of input')
+
+            self._values.extend(parse_value(value) for value in values)
+
+        return [self._values.popleft() for i in range(count)]
+
+    def more(self):
+        return None
+
+
+class ConsoleInput(Input):
+    def more(self):
+        try:
+            line = input('?')
+        except EOFError:
+            return None
+
+        return [value for value in SEPARATORS.split(line) if value]
+
+
+class IteratorInput(Input):
+    def __init__(self, values):
+        Input.__init__(self)
+        self._iterator = iter(values)
+
+    def more(self):
+        for value in self._iterator:
+            return [value]
+
+        return None
+
+
+class QueueInput(Input):
+    def __init__(self):
+        Input.__init__(self)
+        self._lines = deque()
+        self.closed = False
+
+    def feed(self, line):
+        self._lines.append(line)
+
+    def close(self):
+        self.closed = True
+
+    def more(self):
+        if self._lines:
+            return [value for value in SEPARATORS.split(self._lines.popleft()) if value]
+
+        if self.closed:
+            return None
+
+        raise InputPending()
+
+
+class StreamInput(Input):
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, stream = None, chunk_size = CHUNK_SIZE):
+        Input.__init__(self)
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._partial = ''
+
+    def more(self):
+        if self._partial is None:
+            return None
+
+        data = (self.stream or sys.stdin).read(self.chunk_size)
+        if not data:
+            values, self._partial = [self._partial], None
+        else:
+            values = SEPARATORS.split(self._partial + data)
+            self._partial = values.pop()
+
+        return [value for value in values if value]
+
+
+class FileInput(StreamInput):
+    def __init__(self, path, chunk_size = StreamInput.CHUNK_SIZE):
+        StreamInput.__init__(self, open(path), chunk_size)
+
+    def close(self):
+        self.stream.close()
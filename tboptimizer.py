@@ -0,0 +1,83 @@
+from tbparser import Node
+
+
+class Optimizer:
+    def __init__(self, parser):
+        self._parser = parser
+
+    def optimize_statement(self, statement):
+        command = statement.command
+
+        if command == 'LET':
+            statement.expression = self.optimize(statement.expression)
+        elif command == 'PRINT':
+            statement.items = [self.optimize(item) for item in statement.items]
+        elif command == 'IF':
+            statement.expression = self.optimize(statement.expression)
+            self.optimize_statement(statement.then)
+        elif command == 'GOTO' or command == 'GOSUB':
+            statement.expression = self.optimize(statement.expression)
+            if statement.expression.type == Node.NUMBER:
+                statement.target = statement.expression.value
+
+        return statement
+
+    def optimize(self, node):
+        type = node.type
+
+        if type == Node.OPERATOR or type == Node.RELOP:
+            node = Node(type, node.value, self.optimize(node.left), self.optimize(node.right))
+        elif type == Node.NEGATE:
+            node = Node(type, left = self.optimize(node.left))
+        else:
+            return node
+
+        if self.constant(node.left) and (node.right is None or self.constant(node.right)):
+            try:
+                return Node(Node.NUMBER, self._parser.evaluate(node))
+            except ArithmeticError:
+                return node
+
+        return self.simplify(node)
+
+    def simplify(self, node):
+        left = node.left
+        right = node.right
+
+        if node.type == Node.NEGATE:
+            if left.type == Node.NEGATE and self.integral(left.left):
+                return left.left
+        elif node.type == Node.OPERATOR:
+            op = node.value
+
+            if op == '*' and self.is_value(right, 1) and self.integral(left):
+                return left
+            elif op == '*' and self.is_value(left, 1) and self.integral(right):
+                return right
+            elif (op == '+' or op == '-') and self.is_value(right, 0) and self.integral(left):
+                return left
+            elif op == '+' and self.is_value(left, 0) and self.integral(right):
+                return right
+
+        return node
+
+    def constant(self, node):
+        return node.type == Node.NUMBER
+
+    def is_value(self, node, value):
+        return node.type == Node.NUMBER and type(node.value) is int and node.value == value
+
+    def integral(self, node):
+        type = node.type
+
+        if type == Node.NUMBER:
+            return isinstance(node.value, int)
+        elif type == Node.VARIABLE or type == Node.RELOP:
+            return True
+        elif type == Node.NEGATE:
+            return self.integral(node.left)
+        elif type == Node.OPERATOR:
+            return ((node.value != '/' or self._parser.integer) and self.integral(node.left)
+                    and self.integral(node.right))
+        else:
+            return False
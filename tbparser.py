@@ -1,8 +1,60 @@
 from tokenizer import Token
+from variables import Variables
+
+
+def divide(left, right):
+    quotient = abs(left) // abs(right)
+    return -quotient if (left < 0) != (right < 0) else quotient
+
+
+def wrap16(value):
+    return (value + 0x8000 & 0xFFFF) - 0x8000
+
+
+class Node:
+    NUMBER = 1
+    STRING = 2
+    OPERATOR = 3
+    VARIABLE = 6
+    RELOP = 7
+    NEGATE = 13
+
+    def __init__(self, type, value = None, left = None, right = None):
+        self.type = type
+        self.value = value
+        self.left = left
+        self.right = right
+
+
+class Statement:
+    COMMANDS = ('LET', 'PRINT', 'LIST', 'INPUT', 'IF', 'RUN', 'END', 'GOTO', 'GOSUB', 'RETURN')
+
+    def __init__(self, command, variable = None, expression = None, items = None, then = None):
+        self.command = command
+        self.variable = variable
+        self.expression = expression
+        self.items = items
+        self.then = then
+        self.target = None
+        self.fused = None
+
 
 class Parser:
-    def __init__(self, variables):
+    RELOPS = ('<', '>', '<=', '>=', '=', '<>', '><')
+    MODES = ('default', 'integer', 'int16')
+
+    def __init__(self, variables, mode = 'default'):
+        if not isinstance(variables, Variables):
+            variables = Variables(variables)
+        if mode not in self.MODES:
+            raise Exception('Unknown arithmetic mode: ' + mode)
+
         self._variables = variables
+        self._values = variables.values
+
+        self.mode = mode
+        self.integer = mode != 'default'
+        self.wrap = mode == 'int16'
 
     def match_statement(self, tokenizer):
         statement = tokenizer.getNextToken()
@@ -12,29 +64,7 @@ class Parser:
         return statement.value
 
     def match_relop(self, tokenizer):
-        left = self.match_factor(tokenizer)
-
-        relop = tokenizer.peekNextToken()
-        if relop.type != Token.RELOP and relop.type != Token.EQUALS:
-            return left
-
-        tokenizer.getNextToken()
-        right = self.match_factor(tokenizer)
-
-        if relop.value == '<':
-            return int(left < right)
-        elif relop.value == '>':
-            return int(left > right)
-        elif relop.value == '<=':
-            return int(left <= right)
-        elif relop.value == '>=':
-            return int(left >= right)
-        elif relop.value == '=':
-            return int(left == right)
-        elif relop.value == '<>' or relop.value == '><':
-            return int(left != right)
-        else:
-            raise Exception("Unimplemented relative operator: " + relop.value)
+        return self.evaluate(self.parse_relop(tokenizer))
 
     def match_var_list(self, tokenizer):
         list = [self.match_var(tokenizer)]
@@ -53,20 +83,7 @@ class Parser:
         return token.value
 
     def match_expression_list(self, tokenizer):
-        if tokenizer.peekNextToken().type == Token.STRING:
-            list = [self.match_string(tokenizer)]
-        else:
-            list = [self.match_expression(tokenizer)]
-
-        while tokenizer.peekNextToken().type == Token.COMMA:
-            tokenizer.getNextToken()
-
-            if tokenizer.peekNextToken().type == Token.STRING:
-                list.append(self.match_string(tokenizer))
-            else:
-                list.append(self.match_expression(tokenizer))
-
-        return list
+        return [self.evaluate(item) for item in self.parse_expression_list(tokenizer)]
 
     def match_string(self, tokenizer):
         token = tokenizer.getNextToken()
@@ -76,53 +93,115 @@ class Parser:
         return token.value
 
     def match_expression(self, tokenizer):
-        sign = 1
+        return self.evaluate(self.parse_expression(tokenizer))
+
+    def match_term(self, tokenizer):
+        return self.evaluate(self.parse_term(tokenizer))
+
+    def match_factor(self, tokenizer):
+        return self.evaluate(self.parse_factor(tokenizer))
+
+    def match_bracketed_expression(self, tokenizer):
+        return self.evaluate(self.parse_bracketed_expression(tokenizer))
+
+
+    def parse_statement(self, tokenizer):
+        command = self.match_statement(tokenizer)
+
+        if command == 'LET':
+            variable = Variables.slot(self.match_var(tokenizer))
+
+            if tokenizer.getNextToken().type != Token.EQUALS:
+                raise Exception('Expected an equals')
+
+            return Statement(command, variable = variable, expression = self.parse_expression(tokenizer))
+        elif command == 'PRINT':
+            return Statement(command, items = self.parse_expression_list(tokenizer))
+        elif command == 'INPUT':
+            return Statement(command, items = [Variables.slot(name) for name in self.match_var_list(tokenizer)])
+        elif command == 'IF':
+            condition = self.parse_relop(tokenizer)
+
+            then = tokenizer.getNextToken()
+            if then.type != Token.COMMAND or then.value != 'THEN':
+                raise Exception('Expected then after relative operator')
+
+            return Statement(command, expression = condition, then = self.parse_statement(tokenizer))
+        elif command == 'GOTO' or command == 'GOSUB':
+            return Statement(command, expression = self.parse_expression(tokenizer))
+        elif command in Statement.COMMANDS:
+            return Statement(command)
+        else:
+            raise Exception('Unrecognised statement: ' + command)
+
+    def parse_relop(self, tokenizer):
+        left = self.parse_factor(tokenizer)
+
+        relop = tokenizer.peekNextToken()
+        if relop.type != Token.RELOP and relop.type != Token.EQUALS:
+            return left
+
+        tokenizer.getNextToken()
+        if relop.value not in self.RELOPS:
+            raise Exception("Unimplemented relative operator: " + relop.value)
+
+        return Node(Node.RELOP, relop.value, left, self.parse_factor(tokenizer))
+
+    def parse_expression_list(self, tokenizer):
+        list = [self.parse_expression_item(tokenizer)]
+
+        while tokenizer.peekNextToken().type == Token.COMMA:
+            tokenizer.getNextToken()
+            list.append(self.parse_expression_item(tokenizer))
+
+        return list
+
+    def parse_expression_item(self, tokenizer):
+        if tokenizer.peekNextToken().type == Token.STRING:
+            return Node(Node.STRING, self.match_string(tokenizer))
+
+        return self.parse_expression(tokenizer)
+
+    def parse_expression(self, tokenizer):
+        sign = None
         token = tokenizer.peekNextToken()
         if token.type == Token.OPERATOR:
             tokenizer.getNextToken()
-            if token.value == '-':
-                sign = -1
+            sign = token.value
 
-        val = self.match_term(tokenizer)
+        node = self.parse_term(tokenizer)
 
         while tokenizer.peekNextToken().type == Token.OPERATOR:
             op = tokenizer.getNextToken()
-            right = self.match_term(tokenizer)
+            node = Node(Node.OPERATOR, op.value, node, self.parse_term(tokenizer))
 
-            if op.value == '+':
-                val = val + right
-            else:
-                val = val - right
+        if sign == '-':
+            node = Node(Node.NEGATE, left = node)
 
-        return sign * val
+        return node
 
-    def match_term(self, tokenizer):
-        val = self.match_factor(tokenizer)
+    def parse_term(self, tokenizer):
+        node = self.parse_factor(tokenizer)
 
         while tokenizer.peekNextToken().type == Token.MULTOPERATOR:
             op = tokenizer.getNextToken()
-            right = self.match_factor(tokenizer)
+            node = Node(Node.OPERATOR, op.value, node, self.parse_factor(tokenizer))
 
-            if op.value == '*':
-                val = val * right
-            else:
-                val = val / right
+        return node
 
-        return val
-
-    def match_factor(self, tokenizer):
+    def parse_factor(self, tokenizer):
         factor = tokenizer.getNextToken()
         if factor.type == Token.NUMBER:
-            return int(factor.value)
+            return Node(Node.NUMBER, wrap16(int(factor.value)) if self.wrap else int(factor.value))
         elif factor.type == Token.VARIABLE:
-            return int(self._variables.get(factor.value, 0))
+            return Node(Node.VARIABLE, Variables.slot(factor.value))
         elif factor.type == Token.LBRACKET:
-            return self.match_bracketed_expression(tokenizer)
+            return self.parse_bracketed_expression(tokenizer)
         else:
             raise Exception('Unexpected type for factor')
 
-    def match_bracketed_expression(self, tokenizer):
-        result = self.match_expression(tokenizer)
+    def parse_bracketed_expression(self, tokenizer):
+        result = self.parse_expression(tokenizer)
 
         if tokenizer.getNextToken().type != Token.RBRACKET:
             raise Exception('Expected closing bracket')
@@ -130,3 +209,56 @@ class Parser:
         return result
 
 
+    def evaluate(self, node):
+        type = node.type
+
+        if type == Node.NUMBER:
+            return node.value
+        elif type == Node.VARIABLE:
+            if self.integer:
+                return self._values[node.value]
+
+            return int(self._values[node.value])
+        elif type == Node.OPERATOR:
+            left = self.evaluate(node.left)
+            right = self.evaluate(node.right)
+
+            op = node.value
+            if op == '+':
+                result = left + right
+            elif op == '-':
+                result = left - right
+            elif op == '*':
+                result = left * right
+            elif self.integer:
+                result = divide(left, right)
+            else:
+                return left / right
+
+            return wrap16(result) if self.wrap else result
+        elif type == Node.RELOP:
+            left = self.evaluate(node.left)
+            right = self.evaluate(node.right)
+
+            op = node.value
+            if op == '<':
+                return int(left < right)
+            elif op == '>':
+                return int(left > right)
+            elif op == '<=':
+                return int(left <= right)
+            elif op == '>=':
+                return int(left >= right)
+            elif op == '=':
+                return int(left == right)
+            else:
+                return int(left != right)
+        elif type == Node.NEGATE:
+            if self.wrap:
+                return wrap16(-self.evaluate(node.left))
+
+            return -self.evaluate(node.left)
+        elif type == Node.STRING:
+            return node.value
+        else:
+            raise Exception('Unexpected node type')
@@ -0,0 +1,86 @@
+import operator
+
+from tbparser import Node
+
+
+RELOPS = {'<': operator.lt, '>': operator.gt, '<=': operator.le, '>=': operator.ge, '=': operator.eq,
+          '<>': operator.ne, '><': operator.ne}
+
+
+class Peephole:
+    KINDS = ('INCREMENT', 'BRANCH', 'CALL')
+
+    def __init__(self):
+        self.fused = dict.fromkeys(self.KINDS, 0)
+        self.fired = dict.fromkeys(self.KINDS, 0)
+
+    def fuse(self, statement):
+        fused = self.match(statement)
+        if fused is not None:
+            statement.fused = fused
+            self.fused[fused[0]] += 1
+
+        return statement
+
+    def match(self, statement):
+        command = statement.command
+
+        if command == 'LET':
+            return self.match_increment(statement)
+        elif command == 'IF':
+            return self.match_branch(statement)
+        elif command == 'GOSUB' and statement.target is not None:
+            return ('CALL', statement.target, [None, None])
+
+        return None
+
+    def match_increment(self, statement):
+        node = statement.expression
+        if node.type != Node.OPERATOR or (node.value != '+' and node.value != '-'):
+            return None
+
+        left = node.left
+        right = node.right
+        if node.value == '+' and self.is_constant(left) and self.is_variable(right, statement.variable):
+            return ('INCREMENT', statement.variable, left.value)
+        elif self.is_variable(left, statement.variable) and self.is_constant(right):
+            return ('INCREMENT', statement.variable, right.value if node.value == '+' else -right.value)
+
+        return None
+
+    def match_branch(self, statement):
+        condition = statement.expression
+        then = statement.then
+        if condition.type != Node.RELOP or then.command != 'GOTO' or then.target is None:
+            return None
+
+        left = self.operand(condition.left)
+        right = self.operand(condition.right)
+        if left is None or right is None:
+            return None
+
+        return ('BRANCH', RELOPS[condition.value], left[0], left[1], right[0], right[1], then.target)
+
+    def operand(self, node):
+        if node.type == Node.VARIABLE:
+            return (node.value, None)
+        elif self.is_constant(node):
+            return (None, node.value)
+
+        return None
+
+    def is_constant(self, node):
+        return node.type == Node.NUMBER and type(node.value) is int
+
+    def is_variable(self, node, slot):
+        return node.type == Node.VARIABLE and node.value == slot
+
+    def clear(self):
+        self.fired = dict.fromkeys(self.KINDS, 0)
+
+    def report(self):
+        text = ['%-10s %10s %12s' % ('fused', 'lines', 'executions')]
+        for kind in self.KINDS:
+            text.append('%-10s %10d %12d' % (kind, self.fused[kind], self.fired[kind]))
+
+        return '\n'.join(text) + '\n'
@@ -0,0 +1,56 @@
+class LineProfile:
+    __slots__ = ('count', 'parse_time', 'execute_time')
+
+    def __init__(self):
+        self.count = 0
+        self.parse_time = 0.0
+        self.execute_time = 0.0
+
+    @property
+    def total_time(self):
+        return self.parse_time + self.execute_time
+
+
+class Profiler:
+    def __init__(self):
+        self.lines = {}
+        self.edges = {}
+
+    def record(self, number, parse_time, execute_time):
+        profile = self.lines.get(number)
+        if profile is None:
+            profile = self.lines[number] = LineProfile()
+
+        profile.count += 1
+        profile.parse_time += parse_time
+        profile.execute_time += execute_time
+
+    def record_edge(self, source, target, command):
+        key = (source, target, command)
+        self.edges[key] = self.edges.get(key, 0) + 1
+
+    def clear(self):
+        self.lines = {}
+        self.edges = {}
+
+    def hot_lines(self, limit = None):
+        lines = sorted(self.lines.items(), key=lambda x: (-x[1].total_time, x[0]))
+        return lines[:limit] if limit is not None else lines
+
+    def report(self, limit = None):
+        total = sum(profile.total_time for profile in self.lines.values()) or 1.0
+
+        text = ['%8s %10s %12s %12s %7s' % ('line', 'count', 'parse ms', 'execute ms', 'time %')]
+        for number, profile in self.hot_lines(limit):
+            text.append('%8d %10d %12.3f %12.3f %7.1f' % (number, profile.count, profile.parse_time * 1000,
+                                                         profile.execute_time * 1000,
+                                                         100 * profile.total_time / total))
+
+        if self.edges:
+            text.append('')
+            text.append('%8s %8s %-7s %10s' % ('from', 'to', 'command', 'count'))
+            edges = sorted(self.edges.items(), key=lambda x: (-x[1], x[0][0], str(x[0][1])))
+            for (source, target, command), count in edges:
+                text.append('%8d %8s %-7s %10d' % (source, target, command, count))
+
+        return '\n'.join(text) + '\n'
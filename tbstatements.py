@@ -0,0 +1,44 @@
+from collections import OrderedDict
+
+
+class StatementCache:
+    SIZE = 256
+
+    def __init__(self, size = SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, text):
+        statement = self._entries.get(text)
+        if statement is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(text)
+        self.hits += 1
+        return statement
+
+    def put(self, text, statement):
+        if self.size <= 0:
+            return
+
+        self._entries[text] = statement
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        return 'statement cache: %d/%d entries, %d hits, %d misses (%.1f%%)\n' % (
+            len(self._entries), self.size, self.hits, self.misses, rate)
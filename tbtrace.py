@@ -0,0 +1,164 @@
+from tbcompiler import Compiler
+
+
+class Traces:
+    def __init__(self, key):
+        self.key = key
+        self.functions = {}
+        self.counters = {}
+        self.rejected = set()
+
+
+class TraceStep:
+    def __init__(self, index, statement):
+        self.index = index
+        self.statement = statement
+        self.conditions = []
+        self.executed = None
+        self.target = None
+
+
+class TraceCompiler(Compiler):
+    def compile(self, numbers, key = None):
+        return Traces(key)
+
+    def update(self, traces, changes, key = None):
+        return Traces(key)
+
+    def compile_trace(self, steps):
+        self._index = self._interpreter.lines.line_index()
+        self._variables = set()
+        self._lines = []
+
+        for step in steps:
+            for condition, taken in step.conditions:
+                self.collect_expression(condition)
+            self.collect(step.executed, set())
+
+        self.emit(0, 'def trace(_variables, _stack, _write, _goto):')
+        self.emit_load(1)
+        self.emit(1, 'try:')
+        self.emit(2, 'while True:')
+        for step in steps:
+            self.emit_step(step, 3)
+        self.emit(1, 'finally:')
+        self.emit_store(2)
+
+        source = '\n'.join(self._lines) + '\n'
+        namespace = self.namespace()
+        exec(compile(source, '<trace>', 'exec'), namespace)
+
+        return namespace['trace']
+
+    def emit_step(self, step, indent):
+        number = self._interpreter.lines.numbers[step.index]
+        self.emit(indent, '# %d' % number)
+
+        for condition, taken in step.conditions:
+            if taken:
+                self.emit(indent, 'if not (%s):' % self.condition(condition))
+            else:
+                self.emit(indent, 'if %s:' % self.condition(condition))
+            self.emit(indent + 1, 'return %d' % step.index)
+
+        statement = step.executed
+        if statement is None:
+            return
+
+        command = statement.command
+        if command == 'LET' or command == 'PRINT':
+            self.emit_statement(statement, number, indent)
+        elif command == 'GOTO' or command == 'GOSUB':
+            if statement.target is None:
+                self.emit(indent, 'if _goto(%s) != %d:' % (self.expression(statement.expression), step.target))
+                self.emit(indent + 1, 'return %d' % step.index)
+
+            if command == 'GOSUB':
+                self.emit(indent, '_stack.append(%d)' % step.index)
+        elif command == 'RETURN':
+            self.emit(indent, 'if _stack[-1] != %d:' % (step.target - 1))
+            self.emit(indent + 1, 'return %d' % step.index)
+            self.emit(indent, '_stack.pop()')
+
+
+class Tracer:
+    THRESHOLD = 20
+    MAX_STEPS = 500
+    TRACEABLE = ('LET', 'PRINT', 'GOTO', 'GOSUB', 'RETURN')
+
+    def __init__(self, interpreter):
+        self._interpreter = interpreter
+        self._compiler = TraceCompiler(interpreter)
+
+    def run(self, traces):
+        interpreter = self._interpreter
+        parser = interpreter._parser
+        numbers = interpreter.lines.numbers
+        functions = traces.functions
+        counters = traces.counters
+        arguments = (interpreter._variables.values, interpreter._stack, interpreter.output.write,
+                     interpreter.find_line)
+
+        recording = None
+        head = None
+        resumed = None
+
+        while interpreter._program_counter < len(numbers) and interpreter._running:
+            pc = interpreter._program_counter
+
+            if recording is None and pc != resumed:
+                function = functions.get(pc)
+                if function is not None:
+                    interpreter._program_counter = resumed = function(*arguments)
+                    continue
+
+            resumed = None
+            statement = interpreter.get_statement(numbers[pc])
+
+            if recording is None:
+                interpreter.execute_statement(statement)
+                interpreter._program_counter += 1
+
+                target = interpreter._program_counter
+                if (target <= pc and target not in functions and target not in traces.rejected
+                        and self.jumps(statement)):
+                    counters[target] = counters.get(target, 0) + 1
+                    if counters[target] >= self.THRESHOLD:
+                        recording = []
+                        head = target
+                continue
+
+            step = TraceStep(pc, statement)
+            executed = statement
+            while executed is not None and executed.command == 'IF':
+                taken = bool(parser.evaluate(executed.expression))
+                step.conditions.append((executed.expression, taken))
+                executed = executed.then if taken else None
+
+            if executed is not None and executed.command not in self.TRACEABLE:
+                traces.rejected.add(head)
+                recording = None
+                interpreter.execute_statement(statement)
+                interpreter._program_counter += 1
+                continue
+
+            step.executed = executed
+            if executed is not None:
+                interpreter.execute_statement(executed)
+            interpreter._program_counter += 1
+
+            step.target = interpreter._program_counter
+            recording.append(step)
+
+            if step.target == head:
+                functions[head] = self._compiler.compile_trace(recording)
+                recording = None
+            elif len(recording) >= self.MAX_STEPS:
+                traces.rejected.add(head)
+                recording = None
+
+    def jumps(self, statement):
+        while statement.command == 'IF':
+            statement = statement.then
+
+        return statement.command == 'GOTO'
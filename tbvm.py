@@ -0,0 +1,334 @@
+from array import array
+
+from tbparser import Node, divide, wrap16
+
+
+PUSH = 0
+CONST = 1
+LOAD = 2
+STORE = 3
+ADD = 4
+SUBTRACT = 5
+MULTIPLY = 6
+DIVIDE = 7
+NEGATE = 8
+LESS = 9
+GREATER = 10
+LESS_EQUAL = 11
+GREATER_EQUAL = 12
+EQUAL = 13
+NOT_EQUAL = 14
+JUMP = 15
+JUMP_FALSE = 16
+GOTO = 17
+GOSUB = 18
+RETURN = 19
+PRINT = 20
+INPUT = 21
+LIST = 22
+RUN = 23
+END = 24
+RAISE = 25
+HALT = 26
+LOAD_INTEGER = 27
+DIVIDE_INTEGER = 28
+WRAP = 29
+
+OPERATORS = {'+': ADD, '-': SUBTRACT, '*': MULTIPLY, '/': DIVIDE}
+RELOCATED = (CONST, INPUT, RAISE)
+RELOPS = {'<': LESS, '>': GREATER, '<=': LESS_EQUAL, '>=': GREATER_EQUAL, '=': EQUAL, '<>': NOT_EQUAL, '><': NOT_EQUAL}
+
+INT_MIN = -2 ** 31
+INT_MAX = 2 ** 31 - 1
+
+
+class Bytecode:
+    def __init__(self, key, code, constants, addresses, chunks = None, skipped = ()):
+        self.key = key
+        self.code = code
+        self.constants = constants
+        self.addresses = addresses
+        self.chunks = chunks if chunks is not None else {}
+        self.skipped = skipped
+
+
+class BytecodeCompiler:
+    def __init__(self, interpreter):
+        self._interpreter = interpreter
+        self._integer = interpreter._parser.integer
+        self._wrap = interpreter._parser.wrap
+
+    def compile(self, numbers, key = None):
+        self._chunks = {}
+
+        skipped = set()
+        reachable = self._interpreter.analyze().reachable
+        for i, number in enumerate(numbers):
+            if i in reachable:
+                self.compile_line(number)
+            else:
+                self._chunks[number] = (array('i'), (), (), ())
+                skipped.add(number)
+
+        return self.link(numbers, key, skipped)
+
+    def update(self, bytecode, changes, key = None):
+        self._chunks = bytecode.chunks
+
+        index = self._interpreter.lines.line_index()
+        for number in changes | set(bytecode.skipped):
+            if number in index:
+                self.compile_line(number)
+            else:
+                self._chunks.pop(number, None)
+
+        return self.link(self._interpreter.lines.numbers, key)
+
+    def compile_line(self, number):
+        self._code = array('i')
+        self._fixups = []
+        self._constants = []
+        self._relocations = []
+
+        try:
+            statement = self._interpreter.get_statement(number)
+        except Exception as e:
+            self.emit(RAISE, self.constant(e))
+        else:
+            self.compile_statement(statement)
+
+        self._chunks[number] = (self._code, self._fixups, self._constants, self._relocations)
+
+    def link(self, numbers, key, skipped = ()):
+        index = self._interpreter.lines.line_index()
+        chunks = self._chunks
+        code = self._code = array('i')
+        constants = self._constants = []
+        self._relocations = []
+        addresses = array('i')
+
+        fixups = []
+        for i, number in enumerate(numbers):
+            chunk, targets, values, relocations = chunks[number]
+            start = len(code)
+            addresses.append(start)
+            for position, target in targets:
+                fixups.append((start + position, i, target))
+            code.extend(chunk)
+
+            if values:
+                base = len(constants)
+                constants.extend(values)
+                for position in relocations:
+                    code[start + position] += base
+
+        addresses.append(len(code))
+        self.emit(HALT)
+
+        trampolines = {}
+        for position, i, target in fixups:
+            if target is None:
+                code[position] = addresses[i + 1]
+            elif target in index:
+                code[position] = addresses[index[target]]
+            else:
+                if target not in trampolines:
+                    trampolines[target] = len(code)
+                    self.emit_number(target)
+                    self.emit(GOTO)
+                code[position] = trampolines[target]
+
+        return Bytecode(key, code, constants, addresses, chunks, skipped)
+
+    def emit(self, op, arg = 0):
+        self._code.append(op)
+        self._code.append(arg)
+
+        if op in RELOCATED:
+            self._relocations.append(len(self._code) - 1)
+
+    def emit_jump(self, op, target = None):
+        self.emit(op)
+        self._fixups.append((len(self._code) - 1, target))
+
+    def emit_number(self, value):
+        if isinstance(value, int) and INT_MIN <= value <= INT_MAX:
+            self.emit(PUSH, value)
+        else:
+            self.emit(CONST, self.constant(value))
+
+    def constant(self, value):
+        self._constants.append(value)
+        return len(self._constants) - 1
+
+    def compile_statement(self, statement):
+        command = statement.command
+
+        if command == 'LET':
+            self.compile_expression(statement.expression)
+            self.emit(STORE, statement.variable)
+        elif command == 'PRINT':
+            for item in statement.items:
+                self.compile_expression(item)
+            self.emit(PRINT, len(statement.items))
+        elif command == 'LIST':
+            self.emit(LIST)
+        elif command == 'INPUT':
+            self.emit(INPUT, self.constant(statement.items))
+        elif command == 'IF':
+            self.compile_expression(statement.expression)
+            self.emit_jump(JUMP_FALSE)
+            self.compile_statement(statement.then)
+        elif command == 'RUN':
+            self.emit(RUN)
+        elif command == 'END':
+            self.emit(END)
+        elif command == 'GOTO' or command == 'GOSUB':
+            target = statement.target
+            if target is None:
+                self.compile_expression(statement.expression)
+            if command == 'GOSUB':
+                self.emit_jump(GOSUB)
+            if target is None:
+                self.emit(GOTO)
+            else:
+                self.emit_jump(JUMP, target)
+        elif command == 'RETURN':
+            self.emit(RETURN)
+
+    def compile_expression(self, node):
+        type = node.type
+
+        if type == Node.NUMBER:
+            self.emit_number(node.value)
+        elif type == Node.STRING:
+            self.emit(CONST, self.constant(node.value))
+        elif type == Node.VARIABLE:
+            self.emit(LOAD_INTEGER if self._integer else LOAD, node.value)
+        elif type == Node.OPERATOR:
+            self.compile_expression(node.left)
+            self.compile_expression(node.right)
+            if node.value == '/' and self._integer:
+                self.emit(DIVIDE_INTEGER)
+            else:
+                self.emit(OPERATORS[node.value])
+            if self._wrap:
+                self.emit(WRAP)
+        elif type == Node.RELOP:
+            self.compile_expression(node.left)
+            self.compile_expression(node.right)
+            self.emit(RELOPS[node.value])
+        elif type == Node.NEGATE:
+            self.compile_expression(node.left)
+            self.emit(NEGATE)
+            if self._wrap:
+                self.emit(WRAP)
+        else:
+            raise Exception('Unexpected node type')
+
+
+class VirtualMachine:
+    def __init__(self, interpreter):
+        self._interpreter = interpreter
+
+    def run(self, bytecode):
+        interpreter = self._interpreter
+        code = bytecode.code
+        constants = bytecode.constants
+        addresses = bytecode.addresses
+        values = interpreter._variables.values
+        find_line = interpreter.find_line
+        write = interpreter.output.write
+
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        returns = []
+
+        pc = 0
+        while True:
+            op = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+
+            if op == LOAD_INTEGER:
+                push(values[arg])
+            elif op == LOAD:
+                push(int(values[arg]))
+            elif op == PUSH:
+                push(arg)
+            elif op == STORE:
+                values[arg] = pop()
+            elif op == ADD:
+                right = pop()
+                stack[-1] = stack[-1] + right
+            elif op == SUBTRACT:
+                right = pop()
+                stack[-1] = stack[-1] - right
+            elif op == MULTIPLY:
+                right = pop()
+                stack[-1] = stack[-1] * right
+            elif op == WRAP:
+                stack[-1] = (stack[-1] + 0x8000 & 0xFFFF) - 0x8000
+            elif op == JUMP_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+            elif op == LESS:
+                right = pop()
+                stack[-1] = int(stack[-1] < right)
+            elif op == GREATER:
+                right = pop()
+                stack[-1] = int(stack[-1] > right)
+            elif op == LESS_EQUAL:
+                right = pop()
+                stack[-1] = int(stack[-1] <= right)
+            elif op == GREATER_EQUAL:
+                right = pop()
+                stack[-1] = int(stack[-1] >= right)
+            elif op == EQUAL:
+                right = pop()
+                stack[-1] = int(stack[-1] == right)
+            elif op == NOT_EQUAL:
+                right = pop()
+                stack[-1] = int(stack[-1] != right)
+            elif op == DIVIDE:
+                right = pop()
+                stack[-1] = stack[-1] / right
+            elif op == DIVIDE_INTEGER:
+                right = pop()
+                stack[-1] = divide(stack[-1], right)
+            elif op == NEGATE:
+                stack[-1] = -stack[-1]
+            elif op == CONST:
+                push(constants[arg])
+            elif op == GOSUB:
+                returns.append(arg)
+            elif op == RETURN:
+                pc = returns.pop()
+            elif op == GOTO:
+                pc = addresses[find_line(pop())]
+            elif op == PRINT:
+                items = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                write(','.join([str(i) for i in items]) + '\n')
+            elif op == INPUT:
+                interpreter.output.flush()
+                slots = constants[arg]
+                for slot, value in zip(slots, interpreter.input.read_values(len(slots))):
+                    values[slot] = wrap16(value) if interpreter._parser.wrap else value
+            elif op == LIST:
+                interpreter.stat_list()
+            elif op == RUN:
+                interpreter.run_program()
+                return
+            elif op == END:
+                interpreter._running = False
+                return
+            elif op == RAISE:
+                raise constants[arg]
+            elif op == HALT:
+                return
+            else:
+                raise Exception('Unknown opcode: ' + str(op))
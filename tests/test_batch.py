@@ -0,0 +1,50 @@
+import io
+import json
+import os
+import tempfile
+
+from unittest import TestCase, mock
+from batch import main, run_batch, run_programs
+
+
+class TestBatch(TestCase):
+    def test_run_batch(self):
+        source = ['10 INPUT A, B', '20 PRINT A + B']
+        results = run_batch(source, [[1, 2], ['3', '4'], [5]], workers=2)
+
+        self.assertEqual([0, 1, 2], [result.index for result in results])
+        self.assertEqual('3\n', results[0].output)
+        self.assertEqual('7\n', results[1].output)
+        self.assertEqual(4, results[1].variables['B'])
+        self.assertIsNone(results[1].error)
+        self.assertEqual('Exception: Out of input', results[2].error)
+
+    def test_run_batch_engines(self):
+        source = ['10 INPUT N', '20 LET A = A + N', '30 LET N = N - 1', '40 IF N > 0 THEN GOTO 20',
+                  '50 PRINT A']
+        for engine in ('python', 'vm', 'trace'):
+            results = run_batch(source, [[10], [100]], engine, workers=1)
+            self.assertEqual(['55\n', '5050\n'], [result.output for result in results])
+
+    def test_run_programs(self):
+        results = run_programs([['10 PRINT 1'], ['10 GOTO 20'], ['PRINT 1']], workers=2)
+
+        self.assertEqual('1\n', results[0].output)
+        self.assertEqual('Exception: Undefined line number: 20', results[1].error)
+        self.assertEqual('Exception: Expected a line number: PRINT 1', results[2].error)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            program = os.path.join(directory, 'program.bas')
+            inputs = os.path.join(directory, 'inputs.txt')
+            with open(program, 'w') as file:
+                file.write('10 INPUT A\n20 PRINT A * A\n')
+            with open(inputs, 'w') as file:
+                file.write('2\n3\n')
+
+            with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+                self.assertEqual(0, main([program, '--inputs', inputs, '--workers', '1']))
+
+        results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(['4\n', '9\n'], [result['output'] for result in results])
+        self.assertEqual([None, None], [result['error'] for result in results])
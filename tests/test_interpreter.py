@@ -1,5 +1,11 @@
-from unittest import TestCase
-from interpreter import Interpreter
+import io
+import os
+import tempfile
+
+from unittest import TestCase, mock
+from interpreter import Interpreter, main
+from tbcompiler import Compiler
+from tbio import BufferedOutput, InputPending, IteratorInput, MemoryOutput, QueueInput
 
 
 class TestInterpreter(TestCase):
@@ -70,3 +76,454 @@ class TestInterpreter(TestCase):
         self.interpreter.run_program()
 
         self.assertEqual(256, self.interpreter._parser._variables['M'])
+
+    def test_statement_cache(self):
+        self.interpreter.interpret_line('10 LET A = A + 1')
+        self.interpreter.run_program()
+        statement = self.interpreter.get_statement(10)
+
+        self.interpreter.run_program()
+        self.assertIs(statement, self.interpreter.get_statement(10))
+        self.assertEqual(2, self.interpreter._parser._variables['A'])
+
+        self.interpreter.interpret_line('10 LET A = A + 10')
+        self.assertIsNot(statement, self.interpreter.get_statement(10))
+
+        self.interpreter.run_program()
+        self.assertEqual(12, self.interpreter._parser._variables['A'])
+
+    def test_delete_line(self):
+        self.interpreter.interpret_line('10 LET A = 1')
+        self.interpreter.interpret_line('20 LET B = 2')
+        self.interpreter.interpret_line('20')
+
+        self.assertEqual({10:' LET A = 1'}, self.interpreter.lines)
+
+    def test_goto_unknown_line(self):
+        self.interpreter.lines[10] = 'LET A = 1'
+        self.interpreter.lines[20] = 'GOTO 100'
+        self.interpreter.lines[30] = 'LET A = 2'
+
+        with self.assertRaisesRegex(Exception, 'Undefined line number: 100'):
+            self.interpreter.run_program()
+
+        self.assertEqual(1, self.interpreter._parser._variables['A'])
+
+    def test_goto_fractional_line(self):
+        self.interpreter.load_program(['10 GOTO 101 / 2', '20 END', '50 PRINT "WRONG"'])
+
+        with self.assertRaisesRegex(Exception, 'Undefined line number: 50.5'):
+            self.interpreter.run_program()
+
+    def test_check(self):
+        self.interpreter.check = True
+        self.interpreter.load_program(['10 LET A = 1', '20 IF A = 2 THEN GOTO 100', '30 LET B = 2'])
+
+        with self.assertRaisesRegex(Exception, 'Undefined line number: 100 in line 20'):
+            self.interpreter.run_program()
+
+        self.assertEqual(0, self.interpreter.variables['A'])
+
+        self.interpreter.check = False
+        self.interpreter.run_program()
+        self.assertEqual(2, self.interpreter.variables['B'])
+
+    def test_unreachable_lines(self):
+        self.interpreter.load_program(['10 GOTO 40', '20 FOO', '30 GOTO 20', '40 LET A = 1'])
+
+        self.interpreter.run_program()
+        self.assertEqual(1, self.interpreter.variables['A'])
+
+    def test_edit_and_rerun(self):
+        self.interpreter.load_program(['10 GOSUB 100', '20 PRINT A', '30 GOTO 60', '40 END',
+                                       '100 LET A = A + 1', '110 RETURN'])
+
+        with self.assertRaisesRegex(Exception, 'Undefined line number: 60'):
+            self.interpreter.run_program()
+
+        self.interpreter.interpret_line('60 PRINT B')
+        self.interpreter.interpret_line('70 END')
+        self.interpreter.interpret_line('105 LET A = A * 10')
+        self.interpreter.interpret_line('110')
+        self.interpreter.interpret_line('120 RETURN')
+        self.interpreter.output = MemoryOutput()
+        self.interpreter.run_program()
+
+        self.assertEqual('20\n0\n', self.interpreter.output.getvalue())
+
+    def test_edit_unreachable_line(self):
+        self.interpreter.load_program(['10 GOTO 40', '20 LET A = 2', '30 END', '40 LET A = 1'])
+        self.interpreter.run_program()
+        self.assertEqual(1, self.interpreter.variables['A'])
+
+        self.interpreter.interpret_line('10 LET B = 1')
+        self.interpreter.run_program()
+        self.assertEqual(2, self.interpreter.variables['A'])
+
+    def test_line_index(self):
+        self.interpreter.interpret_line('30 END')
+        self.interpreter.interpret_line('10 LET A = 1')
+        self.interpreter.interpret_line('20 GOTO 30')
+
+        self.assertEqual(0, self.interpreter.find_line(10))
+        self.assertEqual(2, self.interpreter.find_line(30))
+
+        self.interpreter.interpret_line('10')
+        self.assertEqual(1, self.interpreter.find_line(30))
+
+    def test_print(self):
+        self.interpreter.output = MemoryOutput()
+
+        self.interpreter.lines[10] = 'LET A = 7'
+        self.interpreter.lines[20] = 'PRINT "A IS", A, A / 2, -A'
+        self.interpreter.lines[30] = 'LIST'
+
+        self.interpreter.run_program()
+
+        self.assertEqual('A IS,7,3.5,-7\n'
+                         '10 LET A = 7\n'
+                         '20 PRINT "A IS", A, A / 2, -A\n'
+                         '30 LIST\n', self.interpreter.output.getvalue())
+
+    def test_input(self):
+        self.interpreter.input = IteratorInput(['3', 4, ' 5 '])
+
+        self.interpreter.lines[10] = 'INPUT A, B'
+        self.interpreter.lines[20] = 'INPUT C'
+        self.interpreter.lines[30] = 'LET D = A + B + C'
+
+        self.interpreter.run_program()
+
+        self.assertEqual(3, self.interpreter._parser._variables['A'])
+        self.assertEqual(12, self.interpreter._parser._variables['D'])
+
+        self.assertRaisesRegex(Exception, 'Out of input', self.interpreter.run_program)
+
+    def test_step(self):
+        self.interpreter.output = MemoryOutput()
+        self.interpreter.input = QueueInput()
+        self.interpreter.load_program(['10 LET A = A + 1', '20 IF A < 5 THEN GOTO 10', '30 INPUT B',
+                                       '40 PRINT A + B'])
+
+        self.interpreter.start_program()
+        self.assertEqual(3, self.interpreter.step(3))
+        self.assertEqual(2, self.interpreter.variables['A'])
+
+        self.assertRaises(InputPending, self.interpreter.step, 100)
+        self.assertTrue(self.interpreter.running)
+        self.assertEqual(5, self.interpreter.variables['A'])
+
+        self.interpreter.input.feed('10')
+        self.assertEqual(2, self.interpreter.step(100))
+        self.assertFalse(self.interpreter.running)
+        self.assertEqual('15\n', self.interpreter.output.getvalue())
+
+    def test_profile(self):
+        profiler = self.interpreter.enable_profiling()
+
+        self.interpreter.lines[10] = 'LET I = 0'
+        self.interpreter.lines[20] = 'GOSUB 100'
+        self.interpreter.lines[30] = 'LET I = I + 1'
+        self.interpreter.lines[40] = 'IF I < 5 THEN GOTO 20'
+        self.interpreter.lines[50] = 'END'
+        self.interpreter.lines[100] = 'RETURN'
+
+        self.interpreter.run_program()
+
+        self.assertEqual(5, self.interpreter._parser._variables['I'])
+        self.assertEqual(5, profiler.lines[20].count)
+        self.assertEqual(1, profiler.lines[50].count)
+        self.assertEqual(4, profiler.edges[(40, 20, 'GOTO')])
+        self.assertEqual(5, profiler.edges[(20, 100, 'GOSUB')])
+        self.assertEqual(5, profiler.edges[(100, 30, 'RETURN')])
+        self.assertEqual({'INCREMENT': 5, 'BRANCH': 5, 'CALL': 0}, self.interpreter.peephole.fired)
+
+    def test_profile_inlined_subroutine(self):
+        profiler = self.interpreter.enable_profiling()
+        self.interpreter.load_program(['10 LET I = 0', '20 GOSUB 100', '30 LET I = I + 1', '40 IF I < 5 THEN GOTO 20',
+                                       '50 END', '100 LET A = A + 2', '110 RETURN'])
+
+        self.interpreter.run_program()
+
+        self.assertEqual(10, self.interpreter.variables['A'])
+        self.assertEqual(5, profiler.lines[100].count)
+        self.assertEqual(5, profiler.lines[110].count)
+        self.assertEqual(5, profiler.edges[(20, 100, 'GOSUB')])
+        self.assertEqual(5, profiler.edges[(110, 30, 'RETURN')])
+        self.assertEqual(27, sum(profile.count for profile in profiler.lines.values()))
+
+    def test_variables(self):
+        self.interpreter.variables.load({'A': 3})
+        self.interpreter.run_line('LET B = A * 2')
+
+        self.assertEqual([3, 6] + [0] * 24, self.interpreter.variables.dump())
+
+    def test_load_program(self):
+        self.interpreter.load_program('30 END\n10 LET A = 1\n\n20 LET A = A + 1\n')
+
+        self.assertEqual([10, 20, 30], list(self.interpreter.lines.numbers))
+
+        self.interpreter.run_program()
+        self.assertEqual(2, self.interpreter._parser._variables['A'])
+
+        self.assertRaises(Exception, self.interpreter.load_program, ['PRINT A'])
+
+    def test_load_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'prog.bas')
+            with open(path, 'w') as file:
+                file.write('20 LET B = A * 2\r\n10 LET A = 21\r\n')
+
+            self.interpreter.load_file(path)
+            self.assertEqual({10: ' LET A = 21', 20: ' LET B = A * 2'}, self.interpreter.lines)
+
+            self.interpreter.lines.clear()
+            self.interpreter.MMAP_THRESHOLD = 0
+            self.interpreter.load_file(path)
+            self.interpreter.run_program()
+
+        self.assertEqual(42, self.interpreter._parser._variables['B'])
+
+    def test_computed_goto(self):
+        self.interpreter.lines[10] = 'LET A = 2'
+        self.interpreter.lines[20] = 'GOTO A * 20'
+        self.interpreter.lines[30] = 'LET B = 1'
+        self.interpreter.lines[40] = 'LET C = 1'
+
+        self.interpreter.run_program()
+
+        self.assertEqual(0, self.interpreter._parser._variables.get('B', 0))
+        self.assertEqual(1, self.interpreter._parser._variables['C'])
+
+    def test_division(self):
+        self.interpreter.lines[10] = 'LET A = 7 / 2'
+        self.interpreter.lines[20] = 'LET B = A * 2'
+
+        self.interpreter.run_program()
+
+        self.assertEqual(3.5, self.interpreter._parser._variables['A'])
+        self.assertEqual(6, self.interpreter._parser._variables['B'])
+
+    def test_integer_mode(self):
+        interpreter = Interpreter(engine = self.interpreter.engine, mode = 'integer',
+                                  output = MemoryOutput(), input = IteratorInput(['-7']))
+        interpreter.load_program(['10 INPUT A', '20 LET B = A / 2', '30 LET C = 7 / (-2)', '40 LET D = D + A / 3',
+                                  '50 LET I = I + 1', '60 IF I < 30 THEN GOTO 40', '70 PRINT A / 2 * 2, 40000 * 2'])
+
+        interpreter.run_program()
+
+        self.assertEqual([-7, -3, -3, -60], [interpreter.variables[name] for name in 'ABCD'])
+        self.assertEqual('-6,80000\n', interpreter.output.getvalue())
+
+    def test_int16_mode(self):
+        interpreter = Interpreter(engine = self.interpreter.engine, mode = 'int16',
+                                  output = MemoryOutput(), input = IteratorInput([32768]))
+        interpreter.load_program(['10 INPUT A', '20 LET B = 32767 + 1', '30 LET C = -A', '40 LET D = D + 1000',
+                                  '50 LET I = I + 1', '60 IF I < 40 THEN GOTO 40', '70 PRINT 200 * 200, 40000'])
+
+        interpreter.run_program()
+
+        self.assertEqual([-32768, -32768, -32768, -25536], [interpreter.variables[name] for name in 'ABCD'])
+        self.assertEqual('-25536,-25536\n', interpreter.output.getvalue())
+
+
+class TestCompactProgram(TestInterpreter):
+    def setUp(self):
+        self.interpreter = Interpreter(compact = True)
+
+
+class TestPythonEngine(TestInterpreter):
+    def setUp(self):
+        self.interpreter = Interpreter(engine = 'python')
+
+    def test_compiled_program_reused(self):
+        self.interpreter.interpret_line('10 LET A = A + 1')
+        self.interpreter.run_program()
+        compiled = self.interpreter._compiled[self.interpreter.engine]
+
+        self.interpreter.run_program()
+        self.assertIs(compiled, self.interpreter._compiled[self.interpreter.engine])
+        self.assertEqual(2, self.interpreter._parser._variables['A'])
+
+
+    def test_incremental_compile(self):
+        self.interpreter.load_program(['10 LET A = 1', '20 GOSUB 100', '30 END', '100 LET A = A + 1', '110 RETURN'])
+        self.interpreter.run_program()
+        analysis = self.interpreter.analyze()
+
+        self.interpreter.interpret_line('105 LET A = A * 3')
+        self.interpreter.run_program()
+
+        self.assertIs(analysis, self.interpreter._analysis)
+        self.assertEqual(6, self.interpreter.variables['A'])
+
+
+class TestVirtualMachineEngine(TestPythonEngine):
+    def setUp(self):
+        self.interpreter = Interpreter(engine = 'vm')
+
+
+    def test_constants_not_accumulated(self):
+        self.interpreter.output = MemoryOutput()
+        self.interpreter.load_program(['10 PRINT "HELLO", 7 / 2', '20 GOTO 41 / 2', '30 FOO'])
+
+        for i in range(20):
+            self.interpreter.interpret_line('10 PRINT "HELLO", 7 / 2')
+            self.assertRaisesRegex(Exception, 'Undefined line number: 20.5', self.interpreter.run_program)
+
+        constants = [str(value) if isinstance(value, Exception) else value
+                     for value in self.interpreter._compiled['vm'].constants]
+        self.assertEqual(['HELLO', 3.5, 'Unrecognised statement: FOO', 20.5], constants)
+
+
+class TestSegments(TestCase):
+    def setUp(self):
+        self.interpreter = Interpreter(engine = 'python')
+
+    def test_segments(self):
+        self.addCleanup(setattr, Compiler, 'SEGMENT', Compiler.SEGMENT)
+        Compiler.SEGMENT = 2
+
+        self.interpreter.load_program(['10 LET A = 1', '20 GOSUB 90', '30 LET I = I + 1', '40 IF I < 3 THEN GOTO 20',
+                                       '50 END', '90 LET A = A * 2', '100 RETURN'])
+        self.interpreter.run_program()
+        self.assertEqual(8, self.interpreter.variables['A'])
+
+        compiled = self.interpreter._compiled['python']
+        self.assertEqual([0, 30, 50, 100], compiled.starts)
+        functions = [segment.function for segment in compiled.segments]
+
+        self.interpreter.interpret_line('35 GOTO 110')
+        self.interpreter.interpret_line('110 LET A = A + 1')
+        self.interpreter.interpret_line('120 END')
+        self.interpreter.run_program()
+
+        self.assertEqual(3, self.interpreter.variables['A'])
+        self.assertEqual([functions[0], functions[2]], [compiled.segments[0].function, compiled.segments[2].function])
+        self.assertNotIn(compiled.segments[1].function, functions)
+        self.assertNotIn(compiled.segments[3].function, functions)
+
+        for number in range(31, 38):
+            self.interpreter.interpret_line('%d LET B = B + 1' % number)
+        self.interpreter.run_program()
+
+        self.assertEqual([0, 30, 32, 34, 36, 40, 50, 100], compiled.starts)
+        self.assertEqual(7, self.interpreter.variables['B'])
+
+
+class TestTraceEngine(TestInterpreter):
+    def setUp(self):
+        self.interpreter = Interpreter(engine = 'trace')
+
+    def test_hot_loop_traced(self):
+        self.interpreter.lines[10] = 'LET I = 0'
+        self.interpreter.lines[20] = 'LET S = S + I'
+        self.interpreter.lines[30] = 'LET I = I + 1'
+        self.interpreter.lines[40] = 'IF I < 1000 THEN GOTO 20'
+
+        self.interpreter.run_program()
+
+        traces = self.interpreter._compiled['trace']
+        self.assertIn(1, traces.functions)
+        self.assertEqual(1000, self.interpreter._parser._variables['I'])
+        self.assertEqual(499500, self.interpreter._parser._variables['S'])
+
+    def test_guard_exits(self):
+        self.interpreter.output = MemoryOutput()
+
+        self.interpreter.lines[10] = 'LET I = 0'
+        self.interpreter.lines[20] = 'LET I = I + 1'
+        self.interpreter.lines[30] = 'IF I > 50 THEN GOSUB 100'
+        self.interpreter.lines[40] = 'IF I < 100 THEN GOTO 20'
+        self.interpreter.lines[50] = 'END'
+        self.interpreter.lines[100] = 'LET J = J + 1'
+        self.interpreter.lines[110] = 'IF J = 10 THEN PRINT "J", I'
+        self.interpreter.lines[120] = 'RETURN'
+
+        self.interpreter.run_program()
+
+        self.assertEqual(100, self.interpreter._parser._variables['I'])
+        self.assertEqual(50, self.interpreter._parser._variables['J'])
+        self.assertEqual('J,60\n', self.interpreter.output.getvalue())
+
+    def test_guard_at_trace_head(self):
+        self.interpreter.lines[10] = 'LET I = 0'
+        self.interpreter.lines[20] = 'IF I > 500 THEN LET J = J + 1'
+        self.interpreter.lines[30] = 'LET I = I + 1'
+        self.interpreter.lines[40] = 'IF I < 1000 THEN GOTO 20'
+
+        self.interpreter.run_program()
+
+        self.assertEqual(1000, self.interpreter._parser._variables['I'])
+        self.assertEqual(499, self.interpreter._parser._variables['J'])
+
+    def test_untraceable_loop(self):
+        self.interpreter.input = IteratorInput(range(100))
+
+        self.interpreter.lines[10] = 'INPUT A'
+        self.interpreter.lines[20] = 'LET S = S + A'
+        self.interpreter.lines[30] = 'IF A < 99 THEN GOTO 10'
+
+        self.interpreter.run_program()
+
+        self.assertEqual(4950, self.interpreter._parser._variables['S'])
+        self.assertIn(0, self.interpreter._compiled['trace'].rejected)
+
+
+class TestInteractive(TestCase):
+    def test_output_before_error(self):
+        stream = io.StringIO()
+        interpreter = Interpreter(output=BufferedOutput(stream))
+
+        with mock.patch('builtins.input', side_effect=['10 PRINT "hello"', '20 GOTO 99', 'RUN']):
+            self.assertRaisesRegex(Exception, 'Undefined line number: 99', interpreter.interactive)
+
+        self.assertEqual('hello\n', stream.getvalue())
+
+    def test_default_output(self):
+        self.assertTrue(Interpreter().output.line_buffered)
+
+
+class TestMain(TestCase):
+    def run_main(self, source, *options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'prog.bas')
+            with open(path, 'w') as file:
+                file.write(source)
+
+            return main([path, '--run'] + list(options))
+
+    def test_run(self):
+        self.assertEqual(0, self.run_main('10 LET A = 1\n20 END\n'))
+        self.assertEqual(0, self.run_main('10 LET A = 1\n20 END\n', '--engine', 'python'))
+        self.assertEqual(0, self.run_main('10 LET A = 1\n20 END\n', '--engine', 'vm'))
+        self.assertEqual(0, self.run_main('10 LET A = A + 1\n20 IF A < 5 THEN GOTO 10\n', '--stats'))
+
+    def test_input_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'input.txt')
+            with open(path, 'w') as file:
+                file.write('1\n2\n')
+
+            self.assertEqual(0, self.run_main('10 INPUT A, B\n', '--input', path))
+            self.assertEqual(1, self.run_main('10 INPUT A, B, C\n', '--input', path))
+
+    def test_check(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'prog.bas')
+            with open(path, 'w') as file:
+                file.write('10 GOTO 30\n20 PRINT 1\n30 END\n')
+
+            self.assertEqual(0, main([path, '--check']))
+
+            with open(path, 'a') as file:
+                file.write('40 GOTO 100\n')
+
+            self.assertEqual(1, main([path, '--check']))
+            self.assertEqual(['prog.bas'], os.listdir(directory))
+
+        self.assertEqual(1, self.run_main('10 IF A = 1 THEN GOTO 100\n', '--check'))
+
+    def test_error_status(self):
+        self.assertEqual(1, self.run_main('10 GOTO 100\n'))
+        self.assertEqual(1, self.run_main('LET A = 1\n'))
@@ -0,0 +1,115 @@
+from unittest import TestCase
+from program import CompactProgram, Program
+
+
+class TestProgram(TestCase):
+    def setUp(self):
+        self.program = Program()
+
+    def test_sorted_insert(self):
+        self.program[30] = 'END'
+        self.program[10] = 'LET A = 1'
+        self.program[20] = 'PRINT A'
+
+        self.assertEqual([10, 20, 30], list(self.program.numbers))
+        self.assertEqual([10, 20, 30], list(self.program))
+        self.assertEqual({10: 'LET A = 1', 20: 'PRINT A', 30: 'END'}, self.program)
+
+    def test_replace_and_delete(self):
+        self.program[10] = 'LET A = 1'
+        self.program[20] = 'PRINT A'
+        self.program[10] = 'LET A = 2'
+
+        self.assertEqual([10, 20], list(self.program.numbers))
+        self.assertEqual('LET A = 2', self.program[10])
+
+        del self.program[10]
+        self.assertEqual([20], list(self.program.numbers))
+        self.assertNotIn(10, self.program)
+        self.assertRaises(KeyError, self.program.__delitem__, 10)
+
+    def test_load(self):
+        self.program[5] = 'REM'
+        self.program.load([(30, 'END'), (10, 'LET A = 1'), (5, None), (20, 'PRINT A')])
+
+        self.assertEqual([10, 20, 30], list(self.program.numbers))
+
+    def test_find(self):
+        self.program.load({10: 'LET A = 1', 20: 'END'})
+
+        self.assertEqual(1, self.program.find(20))
+
+        self.program[15] = 'PRINT A'
+        self.assertEqual(2, self.program.find(20))
+
+        with self.assertRaisesRegex(Exception, 'Undefined line number: 25'):
+            self.program.find(25)
+
+    def test_statements_invalidated(self):
+        self.program[10] = 'LET A = 1'
+        self.program.statements[10] = 'parsed'
+
+        self.program[10] = 'LET A = 2'
+        self.assertNotIn(10, self.program.statements)
+
+
+    def test_line_index_patched(self):
+        self.program.load({10: 'LET A = 1', 20: 'PRINT A', 30: 'END'})
+        index = self.program.line_index()
+
+        self.program[15] = 'LET A = 2'
+        del self.program[20]
+        self.program[30] = 'STOP'
+
+        self.assertIs(index, self.program.line_index())
+        self.assertEqual([0, 1, 2], [index[number] for number in (10, 15, 30)])
+        self.assertNotIn(20, index)
+        self.assertIsNone(index.get(20))
+
+    def test_changes(self):
+        self.program.load({10: 'LET A = 1', 20: 'END'})
+        version = self.program.version
+
+        self.assertEqual(set(), self.program.changes(version))
+
+        self.program[15] = 'PRINT A'
+        self.program[10] = 'LET A = 2'
+        del self.program[20]
+        self.assertEqual({10, 15, 20}, self.program.changes(version))
+        self.assertEqual({20}, self.program.changes(self.program.version - 1))
+
+        self.program.load({30: 'END'})
+        self.assertIsNone(self.program.changes(version))
+
+    def test_changes_overflow(self):
+        version = self.program.version
+        for number in range(1, self.program.JOURNAL_SIZE + 2):
+            self.program[number] = 'END'
+
+        self.assertIsNone(self.program.changes(version))
+        self.assertEqual(set(), self.program.changes(self.program.version))
+
+
+class TestCompactProgram(TestProgram):
+    def setUp(self):
+        self.program = CompactProgram()
+
+    def test_compact(self):
+        self.program[10] = 'PRINT "\u00e9t\u00e9"'
+        for i in range(10):
+            self.program[20] = 'LET A = %d' % i
+
+        self.assertLess(len(self.program._buffer), 40)
+        self.assertEqual({10: 'PRINT "\u00e9t\u00e9"', 20: 'LET A = 9'}, self.program)
+
+    def test_statements_bounded(self):
+        self.program.statements.size = 2
+        for number in (10, 20, 30):
+            self.program[number] = 'END'
+            self.program.statements[number] = 'parsed'
+
+        self.assertEqual([20, 30], list(self.program.statements))
+
+    def test_line_number_range(self):
+        self.assertRaisesRegex(Exception, 'Line number out of range', self.program.__setitem__, 2 ** 40, 'END')
+        self.assertEqual(0, len(self.program))
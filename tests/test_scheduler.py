@@ -0,0 +1,77 @@
+from unittest import TestCase
+from interpreter import Interpreter
+from scheduler import Scheduler, Task
+from tbio import MemoryOutput, QueueInput
+
+
+def create_interpreter(source):
+    interpreter = Interpreter(output=MemoryOutput(), input=QueueInput())
+    interpreter.load_program(source)
+    return interpreter
+
+
+class TestScheduler(TestCase):
+    def setUp(self):
+        self.scheduler = Scheduler(quantum=10)
+
+    def test_interleaved(self):
+        first = create_interpreter(['10 PRINT 1', '20 PRINT 2', '30 END', '40 PRINT 3'])
+        second = create_interpreter(['10 LET A = A + 1', '20 IF A < 100 THEN GOTO 10', '30 PRINT A'])
+
+        tasks = [self.scheduler.add(first), self.scheduler.add(second, 'loop')]
+        self.scheduler.run()
+
+        self.assertEqual([Task.FINISHED, Task.FINISHED], [task.state for task in tasks])
+        self.assertEqual(3, tasks[0].steps)
+        self.assertEqual(1, tasks[0].slices)
+        self.assertEqual(201, tasks[1].steps)
+        self.assertEqual(21, tasks[1].slices)
+        self.assertEqual('1\n2\n', first.output.getvalue())
+        self.assertEqual('100\n', second.output.getvalue())
+
+    def test_step_quota(self):
+        runaway = create_interpreter(['10 GOTO 10'])
+        other = create_interpreter(['10 LET A = A + 1', '20 IF A < 50 THEN GOTO 10'])
+
+        tasks = [self.scheduler.add(runaway, max_steps=25), self.scheduler.add(other)]
+        self.scheduler.run()
+
+        self.assertEqual(Task.FAILED, tasks[0].state)
+        self.assertEqual('Step quota exceeded', tasks[0].error)
+        self.assertEqual(25, tasks[0].steps)
+        self.assertEqual(Task.FINISHED, tasks[1].state)
+
+    def test_time_quota(self):
+        task = self.scheduler.add(create_interpreter(['10 GOTO 10']), max_time=0.01)
+        self.scheduler.run()
+
+        self.assertEqual(Task.FAILED, task.state)
+        self.assertEqual('Time quota exceeded', task.error)
+        self.assertGreaterEqual(task.elapsed, 0.01)
+
+    def test_waiting(self):
+        interpreter = create_interpreter(['10 LET A = 1', '20 INPUT B', '30 PRINT A + B'])
+        task = self.scheduler.add(interpreter)
+        self.scheduler.run()
+
+        self.assertEqual(Task.WAITING, task.state)
+        self.assertEqual(1, task.steps)
+
+        interpreter.input.feed('2')
+        self.scheduler.run()
+
+        self.assertEqual(Task.FINISHED, task.state)
+        self.assertEqual('3\n', interpreter.output.getvalue())
+
+    def test_error(self):
+        task = self.scheduler.add(create_interpreter(['10 GOTO 20']))
+        self.scheduler.run()
+
+        self.assertEqual(Task.FAILED, task.state)
+        self.assertEqual('Undefined line number: 20', task.error)
+
+    def test_report(self):
+        self.scheduler.add(create_interpreter(['10 PRINT 1']), 'hello')
+        self.scheduler.run()
+
+        self.assertIn('hello        finished           1        1', self.scheduler.report())
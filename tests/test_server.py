@@ -0,0 +1,64 @@
+import asyncio
+
+from unittest import TestCase
+from server import Server
+
+
+class TestServer(TestCase):
+    def run_sessions(self, scripts, quantum = 10):
+        async def client(port, lines):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            for line in lines:
+                writer.write((line + '\r\n').encode('utf-8'))
+            await writer.drain()
+            writer.write_eof()
+
+            data = await reader.read()
+            writer.close()
+            return data.decode('utf-8')
+
+        async def run():
+            server = Server(port=0, quantum=quantum)
+            await server.start()
+            try:
+                return await asyncio.gather(*[client(server.port, lines) for lines in scripts])
+            finally:
+                await server.close()
+
+        return asyncio.run(run())
+
+    def test_session(self):
+        output, = self.run_sessions([['10 PRINT "HELLO"', '20 LET A = 2 * 3', 'RUN', 'PRINT A', 'LIST']])
+
+        self.assertTrue(output.startswith('Tiny Basic in Python\r\n>'))
+        self.assertIn('HELLO\r\n', output)
+        self.assertIn('>6\r\n', output)
+        self.assertIn('10  PRINT "HELLO"\r\n20  LET A = 2 * 3\r\n', output)
+
+    def test_input(self):
+        output, = self.run_sessions([['10 INPUT A, B', '20 PRINT A + B', 'RUN', '3', '4', 'INPUT C', '5',
+                                      'PRINT C']])
+
+        self.assertIn('??7\r\n', output)
+        self.assertIn('>?>5\r\n', output)
+
+    def test_nested_run(self):
+        output, = self.run_sessions([['10 PRINT "START"', '20 INPUT A', '30 PRINT A * 2', 'IF 1 THEN RUN', '4',
+                                      'IF 0 THEN RUN', 'PRINT 1']])
+
+        self.assertEqual(1, output.count('START'))
+        self.assertIn('START\r\n?8\r\n>>1\r\n', output)
+
+    def test_concurrent_sessions(self):
+        loop = ['10 LET A = A + 1', '20 IF A < 500 THEN GOTO 10', '30 PRINT A', 'RUN']
+        outputs = self.run_sessions([loop] * 20)
+
+        self.assertEqual(20, len(outputs))
+        for output in outputs:
+            self.assertIn('500\r\n', output)
+
+    def test_error(self):
+        output, = self.run_sessions([['10 GOTO 100', 'RUN', 'INPUT A']])
+
+        self.assertIn('Error: Undefined line number: 100\r\n', output)
+        self.assertIn('Error: Out of input\r\n', output)
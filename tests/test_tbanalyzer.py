@@ -0,0 +1,51 @@
+from unittest import TestCase
+from interpreter import Interpreter
+from tbanalyzer import Analyzer
+from tbcompiler import Compiler
+from tbvm import RAISE, BytecodeCompiler
+
+
+class TestAnalyzer(TestCase):
+    def analyze(self, lines):
+        self.interpreter = Interpreter()
+        self.interpreter.load_program(lines)
+        return Analyzer(self.interpreter).analyze(self.interpreter.lines.numbers)
+
+    def test_successors(self):
+        analysis = self.analyze(['10 LET A = 1', '20 IF A > 0 THEN GOTO 50', '30 GOSUB 60', '40 END',
+                                 '50 GOTO 30', '60 RETURN'])
+
+        self.assertEqual([(1,), (2, 4), (3, 5), (), (2,), ()], analysis.successors)
+        self.assertEqual({1: 4, 2: 5, 4: 2}, analysis.targets)
+        self.assertEqual([], analysis.unreachable)
+        self.assertFalse(analysis.computed)
+
+    def test_unreachable(self):
+        analysis = self.analyze(['10 GOTO 40', '20 PRINT 1', '30 GOTO 20', '40 GOSUB 70', '50 END', '60 PRINT 2',
+                                 '70 RETURN'])
+
+        self.assertEqual([20, 30, 60], analysis.unreachable)
+
+    def test_computed(self):
+        analysis = self.analyze(['10 GOTO A', '20 END', '30 PRINT 1'])
+
+        self.assertTrue(analysis.computed)
+        self.assertEqual([], analysis.unreachable)
+
+    def test_undefined(self):
+        analysis = self.analyze(['10 IF A = 1 THEN GOTO 100', '20 GOSUB 200', '30 FOO'])
+
+        self.assertEqual([(10, 100, 'GOTO'), (20, 200, 'GOSUB')], analysis.undefined)
+        self.assertEqual([30], list(analysis.errors))
+        self.assertEqual([30], analysis.unreachable)
+        self.assertEqual('      10  error: GOTO to undefined line 100\n'
+                         '      20  error: GOSUB to undefined line 200\n'
+                         '      30  error: Unrecognised statement: FOO\n'
+                         '      30  warning: unreachable\n', analysis.report())
+
+    def test_unreachable_not_compiled(self):
+        self.analyze(['10 GOTO 40', '20 FOO', '30 GOTO 20', '40 LET A = 1'])
+        numbers = self.interpreter.lines.numbers
+
+        self.assertNotIn('raise _errors', Compiler(self.interpreter).compile(numbers).source)
+        self.assertNotIn(RAISE, BytecodeCompiler(self.interpreter).compile(numbers).code[::2])
@@ -0,0 +1,110 @@
+import os
+import tempfile
+
+from unittest import TestCase
+from interpreter import Interpreter
+from tbcache import cache_path, decode_statement, encode_statement, load
+from tbio import MemoryOutput
+
+
+class TestCache(TestCase):
+    SOURCE = '10 LET A = 2 * B + 1\n20 IF A > 3 THEN PRINT "BIG", A\n30 GOSUB 50\n40 END\n50 INPUT C, D\n'
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'program.bas')
+        self.write(self.SOURCE)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, source):
+        with open(self.path, 'w') as file:
+            file.write(source)
+
+    def load(self):
+        interpreter = Interpreter(output=MemoryOutput())
+        return interpreter, load(interpreter, self.path)
+
+    def test_encode(self):
+        interpreter = Interpreter()
+        interpreter.load_program(self.SOURCE)
+
+        for number in interpreter.lines:
+            statement = interpreter.get_statement(number)
+            encoded = encode_statement(statement)
+            self.assertEqual(encoded, encode_statement(decode_statement(encoded)))
+
+    def test_cached(self):
+        interpreter, hit = self.load()
+        self.assertFalse(hit)
+        self.assertTrue(os.path.exists(cache_path(self.path)))
+
+        interpreter, hit = self.load()
+        self.assertTrue(hit)
+        self.assertEqual(5, len(interpreter.lines.encoded))
+        self.assertEqual(' LET A = 2 * B + 1', interpreter.lines[10])
+
+        interpreter.variables['B'] = 3
+        interpreter.lines[50] = 'RETURN'
+        interpreter.run_program()
+        self.assertEqual('BIG,7\n', interpreter.output.getvalue())
+
+    def test_compact_bounded(self):
+        self.load()
+
+        interpreter = Interpreter(output=MemoryOutput(), compact=True)
+        interpreter.lines.encoded.size = 2
+        self.assertTrue(load(interpreter, self.path))
+        self.assertEqual([40, 50], list(interpreter.lines.encoded))
+
+        interpreter.variables['B'] = 3
+        interpreter.lines[50] = 'RETURN'
+        interpreter.run_program()
+        self.assertEqual('BIG,7\n', interpreter.output.getvalue())
+
+    def test_stale(self):
+        self.load()
+        self.write(self.SOURCE.replace('2 * B', '3 * B'))
+
+        interpreter, hit = self.load()
+        self.assertFalse(hit)
+
+        interpreter, hit = self.load()
+        self.assertTrue(hit)
+        self.assertEqual(' LET A = 3 * B + 1', interpreter.lines[10])
+
+    def test_corrupt(self):
+        self.load()
+        with open(cache_path(self.path), 'r+b') as file:
+            file.seek(-10, os.SEEK_END)
+            file.write(b'0123456789')
+
+        interpreter, hit = self.load()
+        self.assertFalse(hit)
+        self.assertEqual(5, len(interpreter.lines))
+
+        interpreter, hit = self.load()
+        self.assertTrue(hit)
+
+    def test_no_update(self):
+        interpreter = Interpreter(output=MemoryOutput())
+        self.assertFalse(load(interpreter, self.path, update=False))
+        self.assertEqual(5, len(interpreter.lines))
+        self.assertFalse(os.path.exists(cache_path(self.path)))
+
+    def test_merged_not_cached(self):
+        interpreter = Interpreter(output=MemoryOutput())
+        interpreter.lines[60] = 'END'
+
+        self.assertFalse(load(interpreter, self.path))
+        self.assertEqual(6, len(interpreter.lines))
+        self.assertFalse(os.path.exists(cache_path(self.path)))
+
+    def test_parse_error(self):
+        self.write('10 PRINT 1\n20 FOO\n')
+        self.load()
+
+        interpreter, hit = self.load()
+        self.assertTrue(hit)
+        self.assertRaisesRegex(Exception, 'Unrecognised statement: FOO', interpreter.run_program)
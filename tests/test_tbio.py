@@ -0,0 +1,102 @@
+import io
+import os
+import tempfile
+
+from unittest import TestCase
+from tbio import (BufferedOutput, FileInput, FileOutput, InputPending, IteratorInput, MemoryOutput, QueueInput,
+                  StreamInput)
+
+
+class TestBufferedOutput(TestCase):
+    def test_buffering(self):
+        stream = io.StringIO()
+        output = BufferedOutput(stream, buffer_size = 10)
+
+        output.write('abc\n')
+        self.assertEqual('', stream.getvalue())
+
+        output.write('defghi\n')
+        self.assertEqual('abc\ndefghi\n', stream.getvalue())
+
+        output.write('x\n')
+        output.flush()
+        self.assertEqual('abc\ndefghi\nx\n', stream.getvalue())
+
+    def test_line_buffered(self):
+        stream = io.StringIO()
+        output = BufferedOutput(stream, line_buffered = True)
+
+        output.write('abc')
+        self.assertEqual('', stream.getvalue())
+
+        output.write('\n')
+        self.assertEqual('abc\n', stream.getvalue())
+
+
+class TestMemoryOutput(TestCase):
+    def test_getvalue(self):
+        output = MemoryOutput()
+        output.write('1\n')
+        output.write('2\n')
+
+        self.assertEqual('1\n2\n', output.getvalue())
+
+        output.clear()
+        self.assertEqual('', output.getvalue())
+
+
+class TestFileOutput(TestCase):
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.txt')
+
+            output = FileOutput(path)
+            output.write('hello\n')
+            output.close()
+
+            with open(path) as file:
+                self.assertEqual('hello\n', file.read())
+
+
+class TestIteratorInput(TestCase):
+    def test_read_values(self):
+        input = IteratorInput(['1', 2, '-3'])
+
+        self.assertEqual([1, 2], input.read_values(2))
+        self.assertEqual([-3], input.read_values(1))
+        self.assertRaises(Exception, input.read_values, 1)
+
+    def test_invalid(self):
+        self.assertRaisesRegex(Exception, 'Invalid number: x', IteratorInput(['x']).read_values, 1)
+
+
+class TestQueueInput(TestCase):
+    def test_pending(self):
+        input = QueueInput()
+        input.feed('1')
+
+        self.assertRaises(InputPending, input.read_values, 2)
+        input.feed('2, 3')
+        self.assertEqual([1, 2], input.read_values(2))
+        self.assertEqual([3], input.read_values(1))
+
+        input.close()
+        self.assertRaisesRegex(Exception, 'Out of input', input.read_values, 1)
+
+
+class TestStreamInput(TestCase):
+    def test_chunks(self):
+        input = StreamInput(io.StringIO('10, 20\n 30\n4000'), chunk_size = 3)
+
+        self.assertEqual([10, 20, 30, 4000], input.read_values(4))
+        self.assertRaises(Exception, input.read_values, 1)
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'in.txt')
+            with open(path, 'w') as file:
+                file.write('5 6\n')
+
+            input = FileInput(path)
+            self.assertEqual([5, 6], input.read_values(2))
+            input.close()
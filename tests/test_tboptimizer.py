@@ -0,0 +1,71 @@
+from unittest import TestCase
+from tbparser import Node, Parser
+from tboptimizer import Optimizer
+from tokenizer import Tokenizer
+
+
+class TestOptimizer(TestCase):
+    def setUp(self):
+        self.tokenizer = Tokenizer()
+        self.parser = Parser({})
+        self.optimizer = Optimizer(self.parser)
+
+    def optimize(self, text):
+        self.tokenizer.parse(text)
+        return self.optimizer.optimize(self.parser.parse_expression(self.tokenizer))
+
+    def statement(self, text):
+        self.tokenizer.parse(text)
+        return self.optimizer.optimize_statement(self.parser.parse_statement(self.tokenizer))
+
+    def test_fold_constants(self):
+        node = self.optimize('60 * 60 * 24')
+        self.assertEqual(Node.NUMBER, node.type)
+        self.assertEqual(86400, node.value)
+
+        node = self.optimize('A + (2 * 3)')
+        self.assertEqual(Node.OPERATOR, node.type)
+        self.assertEqual(6, node.right.value)
+
+    def test_fold_division(self):
+        node = self.optimize('7 / 2')
+        self.assertEqual(3.5, node.value)
+        self.assertEqual(3.5, self.parser.evaluate(node))
+
+    def test_division_by_zero_not_folded(self):
+        node = self.optimize('1 / 0')
+        self.assertEqual(Node.OPERATOR, node.type)
+        self.assertRaises(ZeroDivisionError, self.parser.evaluate, node)
+
+    def test_identities(self):
+        self.assertEqual(Node.VARIABLE, self.optimize('A * 1').type)
+        self.assertEqual(Node.VARIABLE, self.optimize('1 * A').type)
+        self.assertEqual(Node.VARIABLE, self.optimize('A + 0').type)
+        self.assertEqual(Node.VARIABLE, self.optimize('A - 0').type)
+        self.assertEqual(Node.VARIABLE, self.optimize('-(-A)').type)
+
+        self.assertEqual(Node.OPERATOR, self.optimize('A / 2 * 1').type)
+
+    def test_same_results(self):
+        self.parser._variables.update({'A': 7, 'B': 3.5})
+
+        for text in ['-2 + 3', '-(A + 0) * 1', 'A / 2 + 0', 'B * 1', '(A - 0) / 2 * 4', '-(-(7 / 2))', '+(+(+A))']:
+            self.tokenizer.parse(text)
+            expected = self.parser.evaluate(self.parser.parse_expression(self.tokenizer))
+            self.assertEqual(expected, self.parser.evaluate(self.optimize(text)), text)
+
+    def test_goto_target(self):
+        self.assertEqual(100, self.statement('GOTO 10 * 10').target)
+        self.assertEqual(30, self.statement('IF A > 1 THEN GOSUB 30').then.target)
+        self.assertEqual(None, self.statement('GOTO A * 10').target)
+
+    def test_integer_mode(self):
+        self.parser = Parser({}, 'int16')
+        self.optimizer = Optimizer(self.parser)
+
+        node = self.optimize('(-7) / 2 + 32767')
+        self.assertEqual(Node.NUMBER, node.type)
+        self.assertEqual(32764, node.value)
+
+        node = self.optimize('A / 2 * 1')
+        self.assertEqual('/', node.value)
@@ -1,5 +1,5 @@
 from unittest import TestCase
-from tbparser import Parser
+from tbparser import Parser, divide, wrap16
 from tokenizer import Tokenizer
 
 class TestParser(TestCase):
@@ -85,3 +85,32 @@ class TestParser(TestCase):
 
         self.assertEqual(10, self.parser.match_term(self.tokenizer))
 
+    def test_parse_statement(self):
+        self.tokenizer.parse('IF A < 3 THEN LET B = -(A + 1) * 2')
+        statement = self.parser.parse_statement(self.tokenizer)
+
+        self.assertEqual('IF', statement.command)
+        self.assertEqual('LET', statement.then.command)
+        self.assertEqual(1, statement.then.variable)
+
+        self.parser._variables['A'] = 2
+        self.assertEqual(1, self.parser.evaluate(statement.expression))
+        self.assertEqual(-6, self.parser.evaluate(statement.then.expression))
+
+    def test_parse_invalid_variable(self):
+        self.tokenizer.parse('LET a = 1')
+        self.assertRaises(Exception, self.parser.parse_statement, self.tokenizer)
+
+    def test_parse_unknown_statement(self):
+        self.tokenizer.parse('FOO 10')
+        self.assertRaises(Exception, self.parser.parse_statement, self.tokenizer)
+
+    def test_integer_arithmetic(self):
+        self.assertEqual([3, -3, -3, 3], [divide(7, 2), divide(-7, 2), divide(7, -2), divide(-7, -2)])
+        self.assertEqual([32767, -32768, 0, -1], [wrap16(32767), wrap16(32768), wrap16(65536), wrap16(-65537)])
+
+        self.parser = Parser({'A': 5}, 'integer')
+        self.tokenizer.parse('A / 2 - 9 / 2')
+        self.assertEqual(-2, self.parser.match_expression(self.tokenizer))
+
+        self.assertRaisesRegex(Exception, 'Unknown arithmetic mode: float', Parser, {}, 'float')
@@ -0,0 +1,80 @@
+from unittest import TestCase
+from interpreter import Interpreter
+from tbio import MemoryOutput
+from tbpeephole import Peephole
+from tbparser import Parser
+from tboptimizer import Optimizer
+from tokenizer import Tokenizer
+
+
+class TestPeephole(TestCase):
+    def setUp(self):
+        self.parser = Parser({})
+        self.optimizer = Optimizer(self.parser)
+        self.peephole = Peephole()
+
+    def fuse(self, text):
+        tokenizer = Tokenizer()
+        tokenizer.parse(text)
+        statement = self.optimizer.optimize_statement(self.parser.parse_statement(tokenizer))
+        return self.peephole.fuse(statement).fused
+
+    def test_increment(self):
+        self.assertEqual(('INCREMENT', 8, 1), self.fuse('LET I = I + 1'))
+        self.assertEqual(('INCREMENT', 8, 2), self.fuse('LET I = 2 + I'))
+        self.assertEqual(('INCREMENT', 8, -6), self.fuse('LET I = I - 2 * 3'))
+        self.assertIsNone(self.fuse('LET I = 1 - I'))
+        self.assertIsNone(self.fuse('LET I = J + 1'))
+        self.assertIsNone(self.fuse('LET I = -I + 1'))
+
+    def test_branch(self):
+        fused = self.fuse('IF I < 10 THEN GOTO 20')
+        self.assertEqual('BRANCH', fused[0])
+        self.assertEqual((8, None, None, 10, 20), fused[2:])
+
+        self.assertEqual((None, 5, 9, None, 30), self.fuse('IF 5 >= J THEN GOTO 30')[2:])
+        self.assertIsNone(self.fuse('IF I < (J + 1) THEN GOTO 20'))
+        self.assertIsNone(self.fuse('IF I < 10 THEN GOTO I'))
+        self.assertIsNone(self.fuse('IF I < 10 THEN PRINT I'))
+
+    def test_call(self):
+        self.assertEqual(('CALL', 100, [None, None]), self.fuse('GOSUB 100'))
+        self.assertIsNone(self.fuse('GOSUB A'))
+        self.assertEqual({'INCREMENT': 0, 'BRANCH': 0, 'CALL': 1}, self.peephole.fused)
+
+
+class TestFusedExecution(TestCase):
+    def run_program(self, lines, mode = 'default'):
+        interpreter = Interpreter(output = MemoryOutput(), mode = mode)
+        interpreter.load_program(lines)
+        interpreter.run_program()
+        return interpreter
+
+    def test_loop(self):
+        interpreter = self.run_program(['10 LET I = I + 1', '20 GOSUB 100', '30 IF I < 10 THEN GOTO 10',
+                                        '40 GOSUB 200', '50 END', '100 LET S = S + I', '110 RETURN',
+                                        '200 PRINT S', '210 GOSUB 100', '220 RETURN'])
+
+        self.assertEqual('55\n', interpreter.output.getvalue())
+        self.assertEqual(65, interpreter.variables['S'])
+        self.assertEqual({'INCREMENT': 10, 'BRANCH': 10, 'CALL': 11}, interpreter.peephole.fired)
+        self.assertEqual([], interpreter._stack)
+
+    def test_modes(self):
+        lines = ['10 LET A = 7 / 2', '20 LET A = A + 1', '30 LET B = 32767', '40 LET B = B + 1',
+                 '50 IF A = 4 THEN GOTO 70', '60 LET C = 1', '70 END']
+
+        interpreter = self.run_program(lines)
+        self.assertEqual([4, 32768, 0], [interpreter.variables[name] for name in 'ABC'])
+
+        interpreter = self.run_program(lines, 'int16')
+        self.assertEqual([4, -32768, 0], [interpreter.variables[name] for name in 'ABC'])
+
+    def test_call_invalidated(self):
+        interpreter = self.run_program(['10 GOSUB 100', '20 END', '100 LET A = A + 1', '110 RETURN'])
+        self.assertEqual(1, interpreter.variables['A'])
+
+        interpreter.lines[105] = 'LET A = A * 10'
+        interpreter.run_program()
+        self.assertEqual(20, interpreter.variables['A'])
+        self.assertEqual(1, interpreter.peephole.fired['CALL'])
@@ -0,0 +1,26 @@
+from unittest import TestCase
+from tbprofiler import Profiler
+
+
+class TestProfiler(TestCase):
+    def setUp(self):
+        self.profiler = Profiler()
+
+    def test_record(self):
+        self.profiler.record(10, 0.5, 1.0)
+        self.profiler.record(10, 0.0, 1.0)
+        self.profiler.record(20, 0.0, 0.25)
+
+        self.assertEqual(2, self.profiler.lines[10].count)
+        self.assertEqual(2.5, self.profiler.lines[10].total_time)
+        self.assertEqual([10, 20], [number for number, profile in self.profiler.hot_lines()])
+        self.assertEqual([10], [number for number, profile in self.profiler.hot_lines(1)])
+
+    def test_report(self):
+        self.profiler.record(10, 0.0, 0.001)
+        self.profiler.record_edge(10, 'END', 'RETURN')
+        self.profiler.record_edge(20, 10, 'GOTO')
+
+        report = self.profiler.report()
+        self.assertIn('      10          1', report)
+        self.assertIn('      20       10 GOTO', report)
@@ -0,0 +1,39 @@
+from unittest import TestCase
+from interpreter import Interpreter
+from tbio import MemoryOutput
+from tbstatements import StatementCache
+
+
+class TestStatementCache(TestCase):
+    def test_lru(self):
+        cache = StatementCache(2)
+        cache.put('PRINT A', 'a')
+        cache.put('PRINT B', 'b')
+
+        self.assertEqual('a', cache.get('PRINT A'))
+        cache.put('PRINT C', 'c')
+
+        self.assertIsNone(cache.get('PRINT B'))
+        self.assertEqual('a', cache.get('PRINT A'))
+        self.assertEqual('c', cache.get('PRINT C'))
+        self.assertEqual((3, 1, 2), (cache.hits, cache.misses, len(cache)))
+        self.assertEqual('statement cache: 2/2 entries, 3 hits, 1 misses (75.0%)\n', cache.report())
+
+    def test_disabled(self):
+        cache = StatementCache(0)
+        cache.put('PRINT A', 'a')
+
+        self.assertIsNone(cache.get('PRINT A'))
+        self.assertEqual(0, len(cache))
+
+    def test_immediate(self):
+        interpreter = Interpreter(output=MemoryOutput(), cache_size=8)
+        interpreter.interpret_line('LET A = A + 1')
+        statement = interpreter.parse_immediate('LET A = A + 1')
+
+        interpreter.interpret_line('LET A = A + 1')
+        interpreter.interpret_line('PRINT A')
+
+        self.assertIs(statement, interpreter.parse_immediate('LET A = A + 1'))
+        self.assertEqual('2\n', interpreter.output.getvalue())
+        self.assertEqual((3, 2), (interpreter.statement_cache.hits, interpreter.statement_cache.misses))
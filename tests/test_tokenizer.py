@@ -1,5 +1,5 @@
 from unittest import TestCase
-from tokenizer import Tokenizer, Token
+from tokenizer import CharacterTokenizer, Tokenizer, Token
 
 class TestTokeniser(TestCase):
     def setUp(self):
@@ -224,3 +224,50 @@ class TestTokeniser(TestCase):
         self.assertEqual(Token.RBRACKET, token.type)
         self.assertEqual(')', token.value)
 
+    def test_token_buffer(self):
+        self.tokenizer.parse('10 PRINT A')
+
+        self.assertIs(self.tokenizer.peekNextToken(), self.tokenizer.peekNextToken())
+        self.assertEqual(10, self.tokenizer.getNextToken().value)
+        self.assertEqual(' PRINT A', self.tokenizer.prog[self.tokenizer.pos:])
+
+        self.assertEqual('PRINT', self.tokenizer.getNextToken().value)
+        self.assertEqual('A', self.tokenizer.getNextToken().value)
+
+        self.assertEqual(Token.EOF, self.tokenizer.getNextToken().type)
+        self.assertEqual(Token.EOF, self.tokenizer.getNextToken().type)
+        self.assertEqual(Token.EOF, self.tokenizer.peekNextToken().type)
+
+    def test_unknown(self):
+        self.tokenizer.parse('A ; B')
+
+        self.assertEqual(Token.VARIABLE, self.tokenizer.getNextToken().type)
+        self.assertEqual(Token.UNKNOWN, self.tokenizer.getNextToken().type)
+        self.assertEqual(Token.UNKNOWN, self.tokenizer.getNextToken().type)
+
+    def test_keywords_shared(self):
+        self.tokenizer.parse('PRINT A')
+        first = self.tokenizer.getNextToken()
+
+        self.tokenizer.parse('PRINT B')
+        self.assertIs(first.value, self.tokenizer.getNextToken().value)
+
+    def test_string_not_terminated(self):
+        self.assertRaises(Exception, self.tokenizer.parse, 'PRINT "ABC')
+
+    def test_compatible(self):
+        lines = ['10 PRINT "A", 1, (2+3)*4', 'IF A<>B THEN GOTO 10', 'LET X=X/2-1', 'A<=>B ; C', '  ', 'gosub  100']
+        reference = CharacterTokenizer()
+
+        for line in lines:
+            self.tokenizer.parse(line)
+            reference.parse(line)
+
+            self.assertEqual([(t.type, t.value) for t in reference.tokens],
+                             [(t.type, t.value) for t in self.tokenizer.tokens])
+            self.assertEqual(reference.ends, self.tokenizer.ends)
+
+
+class TestCharacterTokeniser(TestTokeniser):
+    def setUp(self):
+        self.tokenizer = CharacterTokenizer()
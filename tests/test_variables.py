@@ -0,0 +1,42 @@
+from unittest import TestCase
+from variables import Variables
+
+
+class TestVariables(TestCase):
+    def setUp(self):
+        self.variables = Variables()
+
+    def test_init(self):
+        self.assertEqual([0] * 26, self.variables.dump())
+        self.assertEqual(0, self.variables['Z'])
+
+    def test_set(self):
+        self.variables['C'] = 10
+
+        self.assertEqual(10, self.variables['C'])
+        self.assertEqual(10, self.variables.values[2])
+        self.assertEqual(10, self.variables.get('C', 0))
+        self.assertEqual(None, self.variables.get('c'))
+
+    def test_invalid(self):
+        self.assertRaises(Exception, self.variables.__getitem__, 'a')
+        self.assertRaises(Exception, self.variables.__setitem__, 'AB', 1)
+        self.assertRaises(Exception, Variables.slot, None)
+
+    def test_load_dump(self):
+        values = self.variables.values
+
+        self.variables.load(range(26))
+        self.assertEqual(25, self.variables['Z'])
+        self.assertIs(values, self.variables.values)
+
+        self.variables.load({'A': 5})
+        self.assertEqual(5, self.variables['A'])
+        self.assertEqual(0, self.variables['Z'])
+
+        self.assertRaises(Exception, self.variables.load, [1, 2, 3])
+
+    def test_as_dict(self):
+        self.variables['B'] = 2
+        self.assertEqual(2, self.variables.as_dict()['B'])
+        self.assertEqual(26, len(self.variables.as_dict()))
@@ -1,3 +1,4 @@
+import re
 
 
 class Token:
@@ -14,17 +15,107 @@ class Token:
     COMMA = 10
     LBRACKET = 11
     RBRACKET = 12
+
+    __slots__ = ('type', 'value')
         
     def __init__(self, type = UNKNOWN, value = None):
         self.type = type
         self.value = value
 
 
+Token.EOF_TOKEN = Token(Token.EOF)
+Token.SYMBOLS = {
+    '+': Token(Token.OPERATOR, '+'),
+    '-': Token(Token.OPERATOR, '-'),
+    '*': Token(Token.MULTOPERATOR, '*'),
+    '/': Token(Token.MULTOPERATOR, '/'),
+    '=': Token(Token.EQUALS, '='),
+    ',': Token(Token.COMMA, ','),
+    '(': Token(Token.LBRACKET, '('),
+    ')': Token(Token.RBRACKET, ')'),
+}
+Token.KEYWORDS = {keyword: Token(Token.COMMAND, keyword) for keyword in
+                  ('LET', 'PRINT', 'LIST', 'INPUT', 'IF', 'THEN', 'RUN', 'END', 'GOTO', 'GOSUB', 'RETURN')}
+
+Token.SHARED = dict(Token.SYMBOLS)
+Token.SHARED.update(Token.KEYWORDS)
+Token.SHARED.update((c, Token(Token.VARIABLE, c)) for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+Token.SHARED.update((r, Token(Token.RELOP, r)) for r in ('<', '>', '<=', '>=', '<>', '><', '<<', '>>'))
+
+LEXEME_PATTERN = re.compile(r'(\s*)(\d+|"[^"]*"?|[^\W\d_]+|[<>][=<>]?|\S)')
+
+
 class Tokenizer:
     def parse(self, prog):
         self.prog = prog
         self.pos = 0
 
+        self.tokens = []
+        self.ends = []
+        self.scan()
+
+        self.index = 0
+        self.last = len(self.tokens) - 1
+        self.pos = 0
+
+    def getNextToken(self):
+        index = self.index
+        self.pos = self.ends[index]
+
+        if index < self.last:
+            self.index = index + 1
+
+        return self.tokens[index]
+
+    def peekNextToken(self):
+        return self.tokens[self.index]
+
+    def scan(self):
+        tokens = self.tokens
+        ends = self.ends
+        shared = Token.SHARED
+        pos = 0
+
+        for space, text in LEXEME_PATTERN.findall(self.prog):
+            pos += len(space) + len(text)
+
+            token = shared.get(text)
+            if token is None:
+                c = text[0]
+
+                if c.isdigit():
+                    token = Token(Token.NUMBER, int(text))
+                elif c == '"':
+                    if len(text) < 2 or text[-1] != '"':
+                        raise Exception('String not terminated')
+
+                    token = Token(Token.STRING, text[1:-1])
+                elif c.isalpha() and len(text) > 1:
+                    token = Token(Token.COMMAND, text)
+                elif c.isalpha():
+                    token = Token(Token.VARIABLE, text)
+                else:
+                    tokens.append(Token())
+                    ends.append(pos - len(text))
+                    return
+
+            tokens.append(token)
+            ends.append(pos)
+
+        tokens.append(Token.EOF_TOKEN)
+        ends.append(len(self.prog))
+
+
+class CharacterTokenizer(Tokenizer):
+    def scan(self):
+        while True:
+            token = self.scanToken()
+            self.tokens.append(token)
+            self.ends.append(self.pos)
+
+            if token.type == Token.EOF or token.type == Token.UNKNOWN:
+                break
+
     def currentChar(self):
         return self.prog[self.pos]
 
@@ -38,11 +129,11 @@ class Tokenizer:
         while self.pos < len(self.prog) and self.currentChar().isspace():
             self.pos += 1
 
-    def getNextToken(self):
+    def scanToken(self):
         self.eatWhiteSpace()
 
         if self.pos >= len(self.prog):
-            return Token(Token.EOF)
+            return Token.EOF_TOKEN
 
         c = self.currentChar()
 
@@ -71,13 +162,6 @@ class Tokenizer:
 
         return Token()
 
-    def peekNextToken(self):
-        pos = self.pos
-        token = self.getNextToken()
-        self.pos = pos
-
-        return token
-
     def getNumberToken(self):
         token = Token(Token.NUMBER, 0)
 
@@ -102,13 +186,13 @@ class Tokenizer:
         raise Exception('String not terminated')
 
     def getOperator(self):
-        token = Token(Token.OPERATOR, self.currentChar())
+        token = Token.SYMBOLS[self.currentChar()]
         self.pos += 1
 
         return token
 
     def getMultOperator(self):
-        token = Token(Token.MULTOPERATOR, self.currentChar())
+        token = Token.SYMBOLS[self.currentChar()]
         self.pos += 1
 
         return token
@@ -120,7 +204,7 @@ class Tokenizer:
             token.value += self.currentChar()
             self.pos += 1        
 
-        return token
+        return Token.KEYWORDS.get(token.value) or token
 
     def getVariable(self):
         token = Token(Token.VARIABLE, self.currentChar())
@@ -140,25 +224,25 @@ class Tokenizer:
         return token
 
     def getEquals(self):
-        token = Token(Token.EQUALS, '=')
+        token = Token.SYMBOLS['=']
         self.pos += 1
 
         return token
 
     def getComma(self):
-        token = Token(Token.COMMA, ',')
+        token = Token.SYMBOLS[',']
         self.pos += 1
 
         return token
 
     def getLeftBracket(self):
-        token = Token(Token.LBRACKET, '(')
+        token = Token.SYMBOLS['(']
         self.pos += 1
 
         return token
 
     def getRightBracket(self):
-        token = Token(Token.RBRACKET, ')')
+        token = Token.SYMBOLS[')']
         self.pos += 1
 
         return token
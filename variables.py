@@ -0,0 +1,58 @@
+class Variables:
+    NAMES = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    SLOTS = {name: i for i, name in enumerate(NAMES)}
+
+    __slots__ = ('values',)
+
+    def __init__(self, values = None):
+        self.values = [0] * len(self.NAMES)
+
+        if values:
+            self.load(values)
+
+    @classmethod
+    def slot(cls, name):
+        try:
+            return cls.SLOTS[name]
+        except (KeyError, TypeError):
+            raise Exception('Invalid variable: ' + str(name))
+
+    def __getitem__(self, name):
+        return self.values[self.slot(name)]
+
+    def __setitem__(self, name, value):
+        self.values[self.slot(name)] = value
+
+    def __repr__(self):
+        return 'Variables(%r)' % self.as_dict()
+
+    def get(self, name, default = None):
+        if name in self.SLOTS:
+            return self.values[self.SLOTS[name]]
+
+        return default
+
+    def update(self, values):
+        for name, value in values.items():
+            self[name] = value
+
+    def load(self, values):
+        if isinstance(values, (dict, Variables)):
+            self.reset()
+            self.update(values if isinstance(values, dict) else values.as_dict())
+            return
+
+        values = list(values)
+        if len(values) != len(self.NAMES):
+            raise Exception('Expected %d values' % len(self.NAMES))
+
+        self.values[:] = values
+
+    def dump(self):
+        return list(self.values)
+
+    def as_dict(self):
+        return dict(zip(self.NAMES, self.values))
+
+    def reset(self):
+        self.values[:] = [0] * len(self.NAMES)